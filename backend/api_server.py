@@ -1,19 +1,19 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, request, jsonify
 from flask_cors import CORS
 from ml_model import ChennaiCrimeMLModel
+import metrics
 import json
 import os
 
-app = Flask(__name__)
-CORS(app)  # Enable CORS for React frontend
+bp = Blueprint('api_server', __name__)
 
 # Initialize the ML model
 model = ChennaiCrimeMLModel()
 
-@app.route('/api/predict-crime', methods=['POST'])
+@bp.route('/api/predict-crime', methods=['POST'])
 def predict_crime():
     """Predict crime risk for a single location"""
     try:
@@ -38,7 +38,7 @@ def predict_crime():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/predict-route', methods=['POST'])
+@bp.route('/api/predict-route', methods=['POST'])
 def predict_route():
     """Predict crime risk for multiple locations (route analysis)"""
     try:
@@ -65,7 +65,7 @@ def predict_route():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/safety-heatmap', methods=['POST'])
+@bp.route('/api/safety-heatmap', methods=['POST'])
 def safety_heatmap():
     """Generate safety heatmap data for map visualization"""
     try:
@@ -130,7 +130,7 @@ def generate_heatmap_data(north, south, east, west):
     
     return heatmap_points
 
-@app.route('/api/health', methods=['GET'])
+@bp.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
@@ -139,7 +139,7 @@ def health_check():
         'message': 'Crime Prediction API is running'
     })
 
-@app.route('/api/model-info', methods=['GET'])
+@bp.route('/api/model-info', methods=['GET'])
 def model_info():
     """Get information about the loaded model"""
     return jsonify({
@@ -148,6 +148,11 @@ def model_info():
         'features': model.feature_columns if model.is_trained else []
     })
 
+app = Flask(__name__)
+CORS(app)  # Enable CORS for React frontend
+app.register_blueprint(bp)
+metrics.instrument(app)
+
 if __name__ == '__main__':
     # Load the trained model on startup
     print("🤖 Loading Crime Prediction Model...")
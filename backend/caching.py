@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Small caching primitives shared by the community API.
+
+LRUCache is a thread-safe in-memory tier with optional TTL; SQLiteCache is a
+persistent TTL tier stored in the community database; TieredCache reads
+through both and keeps hit statistics per tier. SingleFlight and
+StaleWhileRevalidateCache protect slow upstream calls from stampedes.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class LRUCache:
+    """Bounded in-memory cache with least-recently-used eviction and optional TTL"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] is not None and entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = time.time() + ttl_seconds if ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """Persistent TTL cache stored as JSON in the cache_entries table"""
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], namespace: str, ttl_seconds: float):
+        self.connect = connect
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> Optional[Any]:
+        conn = self.connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT value FROM cache_entries
+            WHERE namespace = ? AND key = ? AND expires_at > ?
+        ''', (self.namespace, key, time.time()))
+        row = cursor.fetchone()
+        conn.close()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any):
+        conn = self.connect()
+        conn.execute('''
+            INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at)
+            VALUES (?, ?, ?, ?)
+        ''', (self.namespace, key, json.dumps(value), time.time() + self.ttl_seconds))
+        conn.commit()
+        conn.close()
+
+    def purge_expired(self) -> int:
+        conn = self.connect()
+        cursor = conn.execute('DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?',
+                              (self.namespace, time.time()))
+        conn.commit()
+        conn.close()
+        return cursor.rowcount
+
+
+class TieredCache:
+    """Read-through LRU + SQLite cache; persistent hits are promoted into memory"""
+
+    def __init__(self, memory: LRUCache, persistent: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.persistent = persistent
+        self._counters = {"memory_hits": 0, "persistent_hits": 0, "misses": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            self._counters["memory_hits"] += 1
+            return value
+
+        if self.persistent is not None:
+            try:
+                value = self.persistent.get(key)
+            except sqlite3.Error:
+                value = None
+            if value is not None:
+                self._counters["persistent_hits"] += 1
+                self.memory.set(key, value)
+                return value
+
+        self._counters["misses"] += 1
+        return None
+
+    def set(self, key: str, value: Any):
+        self.memory.set(key, value)
+        if self.persistent is not None:
+            try:
+                self.persistent.set(key, value)
+            except sqlite3.Error as e:
+                print(f"⚠️ Cache write failed for {self.persistent.namespace}: {e}")
+
+    def stats(self) -> Dict:
+        lookups = sum(self._counters.values())
+        hits = self._counters["memory_hits"] + self._counters["persistent_hits"]
+        return {
+            **self._counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory)
+        }
+
+
+class _Flight:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one execution"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}  # key -> _Flight
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn() unless a call for key is already running; returns (value, shared)"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, True
+
+        try:
+            flight.value = fn()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.value, False
+
+
+class StaleWhileRevalidateCache:
+    """Bounded cache that serves stale entries while a single background refresh runs.
+
+    Entries are fresh for fresh_seconds and may then be served stale for up to
+    stale_seconds more; concurrent misses for one key share one computation.
+    """
+
+    def __init__(self, max_size: int, fresh_seconds: float, stale_seconds: float):
+        self.fresh_seconds = fresh_seconds
+        self.entries = LRUCache(max_size, fresh_seconds + stale_seconds)
+        self.flights = SingleFlight()
+        self._counters = {"fresh_hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0,
+                          "refreshes": 0, "refresh_errors": 0}
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Tuple[Any, str]:
+        """Returns (value, status) where status is fresh, stale, miss or coalesced.
+
+        Exceptions from compute() propagate on a miss and are never cached.
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            fresh_until, value = entry
+            if fresh_until > time.time():
+                self._counters["fresh_hits"] += 1
+                return value, 'fresh'
+
+            self._counters["stale_hits"] += 1
+            if not self.flights.in_flight(key):
+                threading.Thread(target=self._refresh, args=(key, compute), daemon=True).start()
+            return value, 'stale'
+
+        value, shared = self.flights.do(key, lambda: self._compute_and_store(key, compute))
+        self._counters["coalesced" if shared else "misses"] += 1
+        return value, 'coalesced' if shared else 'miss'
+
+    def stats(self) -> Dict:
+        lookups = self._counters["fresh_hits"] + self._counters["stale_hits"] + \
+            self._counters["misses"] + self._counters["coalesced"]
+        return {
+            **self._counters,
+            "hit_rate": round((lookups - self._counters["misses"]) / lookups, 4) if lookups else 0.0,
+            "entries": len(self.entries)
+        }
+
+    def store(self, key: str, value: Any) -> Any:
+        """Insert a freshly computed value, e.g. one that arrived after its caller stopped waiting"""
+        self.entries.set(key, (time.time() + self.fresh_seconds, value))
+        return value
+
+    def _compute_and_store(self, key: str, compute: Callable[[], Any]) -> Any:
+        return self.store(key, compute())
+
+    def _refresh(self, key: str, compute: Callable[[], Any]):
+        try:
+            self.flights.do(key, lambda: self._compute_and_store(key, compute))
+            self._counters["refreshes"] += 1
+        except Exception as e:
+            # The stale entry keeps being served until it expires
+            self._counters["refresh_errors"] += 1
+            print(f"⚠️ Background refresh of {key} failed: {e}")
@@ -1,13 +1,31 @@
-from flask import Flask, jsonify, request
+from flask import Blueprint, Flask, current_app, jsonify, make_response, request
 from flask_cors import CORS
 import random
 import time
 import requests
 import os
-from datetime import datetime, timedelta
+import hashlib
+import math
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache, wraps
+from werkzeug.http import is_resource_modified
+from geo_index import GridIndex
+import metrics
 
-app = Flask(__name__)
-CORS(app)
+bp = Blueprint('community_api', __name__)
+CORS_EXPOSE_HEADERS = ['ETag', 'Last-Modified']
+
+# Simulated AI analyses are seeded from the quantized location, this version and
+# the current analysis window, so repeated requests get identical (cacheable) bodies
+ANALYSIS_MODEL_VERSION = os.getenv('ANALYSIS_MODEL_VERSION', 'simulated-v1')
+ANALYSIS_WINDOW_SECONDS = int(os.getenv('ANALYSIS_WINDOW_SECONDS', '900'))
+ANALYSIS_CACHE_SIZE = int(os.getenv('ANALYSIS_CACHE_SIZE', '1024'))
+LOCATION_PRECISION = 3  # ~110 m
+# Upper bound on user-supplied search radii; larger ones are clamped
+MAX_RADIUS_KM = float(os.getenv('MAX_RADIUS_KM', '50'))
+
+# Uniform grid over alert coordinates for radius queries (0.05 degrees is ~5.5 km)
+ALERT_INDEX_CELL_DEGREES = float(os.getenv('ALERT_INDEX_CELL_DEGREES', '0.05'))
 
 # Mock data
 COMMUNITY_STATS = {
@@ -22,6 +40,8 @@ ALERTS_DATA = [
         "id": 1,
         "title": "Suspicious Activity Reported",
         "location": "Downtown Mall Parking",
+        "latitude": 13.085,
+        "longitude": 80.2101,
         "timeAgo": "15 minutes ago",
         "severity": "medium",
         "description": "Multiple residents reported suspicious individuals near the parking area. Police have been notified and are investigating.",
@@ -32,6 +52,8 @@ ALERTS_DATA = [
         "id": 2,
         "title": "Traffic Accident",
         "location": "Main Street & 5th Ave",
+        "latitude": 13.0418,
+        "longitude": 80.2341,
         "timeAgo": "1 hour ago",
         "severity": "high",
         "description": "Minor traffic accident causing delays. Emergency services on scene. Please avoid the area if possible.",
@@ -42,6 +64,8 @@ ALERTS_DATA = [
         "id": 3,
         "title": "Power Outage",
         "location": "Riverside District",
+        "latitude": 13.0067,
+        "longitude": 80.2206,
         "timeAgo": "2 hours ago",
         "severity": "low",
         "description": "Planned maintenance causing temporary power outage. Expected to be resolved within 2 hours.",
@@ -52,6 +76,8 @@ ALERTS_DATA = [
         "id": 4,
         "title": "Community Safety Meeting",
         "location": "Community Center",
+        "latitude": 13.0827,
+        "longitude": 80.2707,
         "timeAgo": "3 hours ago",
         "severity": "low",
         "description": "Monthly safety meeting scheduled for tomorrow at 7 PM. All residents welcome to attend.",
@@ -107,26 +133,67 @@ DISCUSSIONS_DATA = [
     }
 ]
 
+alert_index = GridIndex(ALERT_INDEX_CELL_DEGREES)
+for _alert in ALERTS_DATA:
+    alert_index.insert(_alert["id"], _alert["latitude"], _alert["longitude"], _alert)
+
 # Store for new discussions and replies
 discussions_store = DISCUSSIONS_DATA.copy()
 replies_store = {}
 
-@app.route('/api/health', methods=['GET'])
+# Change counter per in-memory store: resource -> [version, last modified]
+resource_versions = {resource: [0, datetime.now(timezone.utc).replace(microsecond=0)]
+                     for resource in ('alerts', 'discussions', 'replies')}
+
+def bump_version(resource):
+    resource_versions[resource] = [resource_versions[resource][0] + 1,
+                                   datetime.now(timezone.utc).replace(microsecond=0)]
+
+def conditional_get(*resources, window_seconds=None):
+    """Answer If-None-Match/If-Modified-Since with a 304 from the change counters before the view runs"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            parts = [f"{resource}:{resource_versions[resource][0]}" for resource in resources]
+            parts.append(request.full_path)
+            if window_seconds:
+                parts.append(str(int(time.time() // window_seconds)))
+            etag = hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:32]
+            last_modified = max(resource_versions[resource][1] for resource in resources)
+            
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            # Weak: bodies also carry relative "timeAgo" strings that are not versioned
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            return response
+        return wrapper
+    return decorator
+
+@bp.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "timestamp": datetime.now().isoformat()})
+    return jsonify({"status": "healthy", "timestamp": datetime.now().isoformat(), "alert_index": alert_index.stats()})
 
-@app.route('/community/stats', methods=['GET'])
+@bp.route('/community/stats', methods=['GET'])
+@conditional_get('alerts', 'discussions')
 def get_community_stats():
-    # Simulate some dynamic changes
+    # Simulate some dynamic changes (seeded, so they only move when the data does)
+    rng = _seeded_rng('stats', *(resource_versions[resource][0] for resource in ('alerts', 'discussions')))
     stats = COMMUNITY_STATS.copy()
-    stats["communityMembers"] += random.randint(-5, 10)
-    stats["safetyRating"] = max(85, min(100, stats["safetyRating"] + random.randint(-2, 2)))
+    stats["communityMembers"] += rng.randint(-5, 10)
+    stats["safetyRating"] = max(85, min(100, stats["safetyRating"] + rng.randint(-2, 2)))
     stats["activeAlerts"] = len(ALERTS_DATA)
-    stats["crimeRateChange"] += random.randint(-2, 2)
+    stats["crimeRateChange"] += rng.randint(-2, 2)
     
     return jsonify(stats)
 
-@app.route('/community/alerts', methods=['GET'])
+@bp.route('/community/alerts', methods=['GET'])
+@conditional_get('alerts')
 def get_alerts():
     # Simulate dynamic time updates
     alerts = []
@@ -151,7 +218,8 @@ def get_alerts():
     
     return jsonify(alerts)
 
-@app.route('/community/discussions', methods=['GET'])
+@bp.route('/community/discussions', methods=['GET'])
+@conditional_get('discussions')
 def get_discussions():
     # Simulate dynamic time updates
     discussions = []
@@ -176,7 +244,8 @@ def get_discussions():
     
     return jsonify(discussions)
 
-@app.route('/community/discussions/<int:discussion_id>', methods=['GET'])
+@bp.route('/community/discussions/<int:discussion_id>', methods=['GET'])
+@conditional_get('discussions', 'replies')
 def get_discussion_detail(discussion_id):
     discussion = next((d for d in discussions_store if d["id"] == discussion_id), None)
     if not discussion:
@@ -221,7 +290,7 @@ def get_discussion_detail(discussion_id):
     
     return jsonify(discussion_detail)
 
-@app.route('/community/discussions', methods=['POST'])
+@bp.route('/community/discussions', methods=['POST'])
 def create_discussion():
     data = request.get_json()
     
@@ -241,9 +310,10 @@ def create_discussion():
     }
     
     discussions_store.append(new_discussion)
+    bump_version('discussions')
     return jsonify(new_discussion), 201
 
-@app.route('/community/discussions/<int:discussion_id>/replies', methods=['POST'])
+@bp.route('/community/discussions/<int:discussion_id>/replies', methods=['POST'])
 def add_reply(discussion_id):
     data = request.get_json()
     
@@ -270,16 +340,24 @@ def add_reply(discussion_id):
     # Update discussion reply count
     discussion["replies"] = len(replies_store[discussion_id])
     discussion["updatedAt"] = datetime.now().isoformat() + "Z"
+    bump_version('replies')
+    bump_version('discussions')
     
     return jsonify(new_reply), 201
 
-@app.route('/community/incidents', methods=['POST'])
+@bp.route('/community/incidents', methods=['POST'])
 def report_incident():
     data = request.get_json()
     
     if not data or not all(key in data for key in ['title', 'description', 'location', 'severity', 'reporter']):
         return jsonify({"error": "Missing required fields"}), 400
     
+    try:
+        latitude = float(data['latitude']) if data.get('latitude') is not None else None
+        longitude = float(data['longitude']) if data.get('longitude') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "Latitude and longitude must be numbers"}), 400
+    
     new_alert = {
         "id": max([a["id"] for a in ALERTS_DATA]) + 1,
         "title": data["title"],
@@ -287,15 +365,47 @@ def report_incident():
         "timeAgo": "just now",
         "severity": data["severity"],
         "description": data["description"],
+        "latitude": latitude,
+        "longitude": longitude,
         "createdAt": datetime.now().isoformat() + "Z",
         "updatedAt": datetime.now().isoformat() + "Z"
     }
     
     ALERTS_DATA.append(new_alert)
+    # Alerts without coordinates stay in the feed but never match a location query
+    if latitude is not None and longitude is not None:
+        alert_index.insert(new_alert["id"], latitude, longitude, new_alert)
+    bump_version('alerts')
     return jsonify(new_alert), 201
 
-def generate_ai_location_alerts(lat, lng, radius):
-    """Generate AI-based location alerts"""
+def _radius_param():
+    """The radius query parameter in km, clamped to [0, MAX_RADIUS_KM] so one request cannot scan the whole index"""
+    radius = request.args.get('radius', 5, type=float)
+    return min(max(radius, 0.0), MAX_RADIUS_KM) if math.isfinite(radius) else 5.0
+
+def _location_key(lat, lng, radius):
+    return f"{lat:.{LOCATION_PRECISION}f}_{lng:.{LOCATION_PRECISION}f}_{radius:g}"
+
+def _analysis_window():
+    return int(time.time()) // ANALYSIS_WINDOW_SECONDS * ANALYSIS_WINDOW_SECONDS
+
+def _seeded_rng(*parts):
+    """Random generator seeded from ANALYSIS_MODEL_VERSION and the given key parts"""
+    raw = '|'.join(str(part) for part in (ANALYSIS_MODEL_VERSION,) + parts)
+    return random.Random(int.from_bytes(hashlib.sha256(raw.encode('utf-8')).digest()[:8], 'big'))
+
+def _etagged_response(body):
+    """JSON response with a strong ETag over its bytes; a matching If-None-Match becomes a 304"""
+    response = jsonify(body)
+    response.set_etag(hashlib.sha256(response.get_data()).hexdigest())
+    return response.make_conditional(request)
+
+def generate_ai_location_alerts(lat, lng, radius, window=None):
+    """Generate AI-based location alerts (deterministic per location and analysis window)"""
+    window = _analysis_window() if window is None else window
+    rng = _seeded_rng('alerts', _location_key(lat, lng, radius), window)
+    window_start = datetime.fromtimestamp(window)
+    
     # Simulate AI-generated alerts based on location
     crime_types = ['Theft', 'Vandalism', 'Assault', 'Burglary', 'Robbery', 'Fraud']
     locations = [
@@ -308,24 +418,25 @@ def generate_ai_location_alerts(lat, lng, radius):
     ]
     
     alerts = []
-    num_alerts = random.randint(2, 5)
+    num_alerts = rng.randint(2, 5)
     
     for i in range(num_alerts):
-        crime_type = random.choice(crime_types)
-        location = random.choice(locations)
-        severity = random.choice(['low', 'medium', 'high'])
+        crime_type = rng.choice(crime_types)
+        location = rng.choice(locations)
+        severity = rng.choice(['low', 'medium', 'high'])
+        minutes_ago = rng.randint(5, 180)
         
         alert = {
-            "id": f"ai_location_{int(time.time())}_{i}",
+            "id": f"ai_location_{window}_{i}",
             "title": f"{crime_type} Incident Reported",
             "location": location,
-            "timeAgo": f"{random.randint(5, 180)} minutes ago",
+            "timeAgo": f"{minutes_ago} minutes ago",
             "severity": severity,
             "description": f"AI analysis detected potential {crime_type.lower()} activity in the {location.lower()}. Stay vigilant and report any suspicious behavior.",
-            "createdAt": datetime.now().isoformat() + "Z",
-            "updatedAt": datetime.now().isoformat() + "Z",
+            "createdAt": (window_start - timedelta(minutes=minutes_ago)).isoformat() + "Z",
+            "updatedAt": (window_start - timedelta(minutes=minutes_ago)).isoformat() + "Z",
             "source": "ai-analysis",
-            "confidence": random.randint(70, 95)
+            "confidence": rng.randint(70, 95)
         }
         alerts.append(alert)
     
@@ -333,11 +444,19 @@ def generate_ai_location_alerts(lat, lng, radius):
 
 def generate_ai_crime_analysis(lat, lng, radius):
     """Generate comprehensive AI crime analysis"""
+    return _cached_ai_crime_analysis(round(lat, LOCATION_PRECISION), round(lng, LOCATION_PRECISION),
+                                     radius, _analysis_window())
+
+@lru_cache(maxsize=ANALYSIS_CACHE_SIZE)
+def _cached_ai_crime_analysis(lat, lng, radius, window):
+    """Pure function of the quantized location, radius, window and model version"""
+    rng = _seeded_rng('analysis', _location_key(lat, lng, radius), window)
+    
     # Simulate AI analysis
-    total_crimes = random.randint(3, 8)
+    total_crimes = rng.randint(3, 8)
     
     # Generate alerts
-    alerts = generate_ai_location_alerts(lat, lng, radius)
+    alerts = generate_ai_location_alerts(lat, lng, radius, window)
     
     # Calculate risk level
     high_severity_count = sum(1 for alert in alerts if alert['severity'] == 'high')
@@ -357,7 +476,7 @@ def generate_ai_crime_analysis(lat, lng, radius):
     
     # Get top crime types
     crime_types = [alert['title'].split()[0] for alert in alerts]
-    top_crime_types = list(set(crime_types))[:3]
+    top_crime_types = list(dict.fromkeys(crime_types))[:3]
     
     # Generate safety recommendations
     safety_recommendations = [
@@ -386,22 +505,20 @@ def generate_ai_crime_analysis(lat, lng, radius):
         }
     }
 
-@app.route('/community/location-alerts', methods=['GET'])
+@bp.route('/community/location-alerts', methods=['GET'])
+@conditional_get('alerts', window_seconds=ANALYSIS_WINDOW_SECONDS)
 def get_location_alerts():
     """Get alerts for a specific location"""
     lat = request.args.get('lat', type=float)
     lng = request.args.get('lng', type=float)
-    radius = request.args.get('radius', 5, type=float)
+    radius = _radius_param()
     
     if not lat or not lng:
         return jsonify({"error": "Latitude and longitude are required"}), 400
     
-    # Filter alerts within radius (simplified distance calculation)
-    location_alerts = []
-    for alert in ALERTS_DATA:
-        # Add some randomness to simulate location-based filtering
-        if random.random() < 0.3:  # 30% chance of being in the area
-            location_alerts.append(alert)
+    # Probe only the grid cells overlapping the radius, then filter by exact distance
+    location_alerts = [dict(alert, distanceKm=round(distance, 2))
+                       for distance, alert in alert_index.query_radius(lat, lng, radius)]
     
     # Add some AI-generated alerts based on location
     ai_alerts = generate_ai_location_alerts(lat, lng, radius)
@@ -409,12 +526,12 @@ def get_location_alerts():
     
     return jsonify(location_alerts)
 
-@app.route('/community/ai-analysis', methods=['GET'])
+@bp.route('/community/ai-analysis', methods=['GET'])
 def get_ai_crime_analysis():
     """Get AI-analyzed crime data for a location"""
     lat = request.args.get('lat', type=float)
     lng = request.args.get('lng', type=float)
-    radius = request.args.get('radius', 5, type=float)
+    radius = _radius_param()
     
     if not lat or not lng:
         return jsonify({"error": "Latitude and longitude are required"}), 400
@@ -422,14 +539,20 @@ def get_ai_crime_analysis():
     try:
         # Generate AI analysis
         analysis = generate_ai_crime_analysis(lat, lng, radius)
-        return jsonify(analysis)
+        return _etagged_response(analysis)
     except Exception as e:
         return jsonify({"error": f"AI analysis failed: {str(e)}"}), 500
 
+app = Flask(__name__)
+CORS(app, expose_headers=CORS_EXPOSE_HEADERS)
+app.register_blueprint(bp)
+metrics.instrument(app)
+
 if __name__ == '__main__':
     print("🚀 Starting Community API Server...")
     print("📊 Available endpoints:")
     print("   GET  /api/health - Health check")
+    print("   GET  /metrics - Prometheus request and stage metrics")
     print("   GET  /community/stats - Community statistics")
     print("   GET  /community/alerts - Neighborhood alerts")
     print("   GET  /community/discussions - Discussion board")
@@ -441,4 +564,3 @@ if __name__ == '__main__':
     print("   POST /community/incidents - Report incident")
     print("\n🌐 Server running on http://localhost:8003")
     app.run(host='0.0.0.0', port=8003, debug=True)
-ho
\ No newline at end of file
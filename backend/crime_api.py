@@ -1,77 +1,99 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, request, jsonify
 from flask_cors import CORS
-import joblib
 import pandas as pd
 import numpy as np
 import os
+import metrics
+from model_bundles import BASE_MODEL_PATH, BundleWatcher
+from shared_resources import datasets, models
 
-app = Flask(__name__)
-CORS(app)  # Enable CORS for frontend requests
+bp = Blueprint('crime_api', __name__)
 
 # === Load Models and Preprocessing Files ===
-MODEL_PATH = 'models/crime_model.pkl'
+MODEL_PATH = BASE_MODEL_PATH
 SCALER_PATH = 'models/scaler.pkl'
 ENCODERS_PATH = 'models/label_encoders.pkl'
 FEATURES_PATH = 'models/feature_columns.pkl'
 NUM_COLS_PATH = 'models/numerical_columns.pkl'
+DATASET_PATH = 'chennai_crime_dataset.csv'
 
 required_files = [MODEL_PATH, SCALER_PATH, ENCODERS_PATH, FEATURES_PATH, NUM_COLS_PATH]
 for f in required_files:
     if not os.path.exists(f):
         raise FileNotFoundError(f"❌ Missing required file: {f}")
 
-# Load objects
-model = joblib.load(MODEL_PATH)
-scaler = joblib.load(SCALER_PATH)
-label_encoders = joblib.load(ENCODERS_PATH)
-feature_columns = joblib.load(FEATURES_PATH)
-numerical_cols = joblib.load(NUM_COLS_PATH)
+# Load objects; the forest comes from the latest published bundle (incremental_update.py)
+model_bundle = BundleWatcher()
+model = model_bundle.load()
+scaler = models.get(SCALER_PATH)
+label_encoders = models.get(ENCODERS_PATH)
+feature_columns = models.get(FEATURES_PATH)
+numerical_cols = models.get(NUM_COLS_PATH)
+
+
+def _preprocess(record):
+    """Encode, align and scale one input record into the model's feature frame"""
+    input_df = pd.DataFrame([record])
+
+    # Apply label encoding
+    for col, le in label_encoders.items():
+        if col in input_df.columns:
+            try:
+                input_df[col] = le.transform(input_df[col].astype(str))
+            except ValueError:
+                input_df[col] = le.transform([le.classes_[-1]])[0]
+        else:
+            input_df[col] = 0
+
+    # Ensure all required columns exist
+    for col in feature_columns:
+        if col not in input_df.columns:
+            input_df[col] = 0
+
+    input_df = input_df[feature_columns]
 
+    # Scale
+    input_df[numerical_cols] = scaler.transform(input_df[numerical_cols])
+    return input_df
 
-@app.route("/", methods=["GET"])
+
+def _predict(record):
+    with metrics.stage('preprocess'):
+        input_df = _preprocess(record)
+    with metrics.stage('inference'):
+        return model.predict(input_df)[0]
+
+
+@bp.before_request
+def refresh_model_bundle():
+    global model
+    refreshed = model_bundle.refresh()
+    if refreshed is not None:
+        model = refreshed
+
+
+@bp.route("/", methods=["GET"])
 def index():
     return jsonify({"message": "🚀 Crime Prediction API is running"})
 
 
-@app.route("/api/health", methods=["GET"])
+@bp.route("/api/health", methods=["GET"])
 def health():
     return jsonify({
         "status": "healthy",
         "message": "Crime Prediction API is running",
-        "model_loaded": True
+        "model_loaded": True,
+        "model_bundle": model_bundle.version or "base"
     })
 
-@app.route("/api/crime/predict", methods=["POST"])
+@bp.route("/api/crime/predict", methods=["POST"])
 def predict():
     try:
         data = request.get_json(force=True, silent=True)
         if not data:
             return jsonify({"error": "No input data received. Send JSON body"}), 400
 
-        input_df = pd.DataFrame([data])
-
-        # Apply label encoding
-        for col, le in label_encoders.items():
-            if col in input_df.columns:
-                try:
-                    input_df[col] = le.transform(input_df[col].astype(str))
-                except ValueError:
-                    input_df[col] = le.transform([le.classes_[-1]])[0]
-            else:
-                input_df[col] = 0
-
-        # Ensure all required columns exist
-        for col in feature_columns:
-            if col not in input_df.columns:
-                input_df[col] = 0
-
-        input_df = input_df[feature_columns]
-
-        # Scale
-        input_df[numerical_cols] = scaler.transform(input_df[numerical_cols])
-
-        # Predict
-        prediction = model.predict(input_df)[0]
+        prediction = _predict(data)
 
         # --- Risk classification ---
         if prediction < 100:
@@ -91,7 +113,7 @@ def predict():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-@app.route("/api/crime/heatmap", methods=["POST"])
+@bp.route("/api/crime/heatmap", methods=["POST"])
 def get_heatmap_data():
     """Get crime heatmap data for map bounds using real Chennai crime dataset"""
     try:
@@ -101,7 +123,8 @@ def get_heatmap_data():
         
         # Load Chennai crime dataset
         try:
-            df = pd.read_csv('chennai_crime_dataset.csv', skiprows=1)  # Skip the first row which is a description
+            with metrics.stage('dataset_load'):
+                df = datasets.get(DATASET_PATH, skiprows=1)  # Skip the first row which is a description
             print(f"Loaded Chennai dataset with {len(df)} records")
             print(f"Dataset columns: {list(df.columns)}")
         except Exception as e:
@@ -146,27 +169,7 @@ def get_heatmap_data():
                     
                     # Make prediction
                     try:
-                        input_df = pd.DataFrame([location_data])
-                        
-                        # Apply label encoding
-                        for col, le in label_encoders.items():
-                            if col in input_df.columns:
-                                try:
-                                    input_df[col] = le.transform(input_df[col].astype(str))
-                                except ValueError:
-                                    input_df[col] = le.transform([le.classes_[-1]])[0]
-                            else:
-                                input_df[col] = 0
-                        
-                        # Ensure all required columns exist
-                        for col in feature_columns:
-                            if col not in input_df.columns:
-                                input_df[col] = 0
-                        
-                        input_df = input_df[feature_columns]
-                        input_df[numerical_cols] = scaler.transform(input_df[numerical_cols])
-                        
-                        prediction = model.predict(input_df)[0]
+                        prediction = _predict(location_data)
                         weight = min(max(prediction / 200, 0), 1)  # Normalize to 0-1
                         
                         heatmap_data.append({
@@ -198,27 +201,7 @@ def get_heatmap_data():
                     }
                     
                     # Make prediction
-                    input_df = pd.DataFrame([location_data])
-                    
-                    # Apply label encoding
-                    for col, le in label_encoders.items():
-                        if col in input_df.columns:
-                            try:
-                                input_df[col] = le.transform(input_df[col].astype(str))
-                            except ValueError:
-                                input_df[col] = le.transform([le.classes_[-1]])[0]
-                        else:
-                            input_df[col] = 0
-                    
-                    # Ensure all required columns exist
-                    for col in feature_columns:
-                        if col not in input_df.columns:
-                            input_df[col] = 0
-                    
-                    input_df = input_df[feature_columns]
-                    input_df[numerical_cols] = scaler.transform(input_df[numerical_cols])
-                    
-                    prediction = model.predict(input_df)[0]
+                    prediction = _predict(location_data)
                     
                     # Calculate weight based on crime severity and frequency
                     base_weight = min(max(prediction / 200, 0), 1)
@@ -260,7 +243,7 @@ def get_heatmap_data():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/crime/route-analysis", methods=["POST"])
+@bp.route("/api/crime/route-analysis", methods=["POST"])
 def analyze_route():
     """Analyze crime risk along a route"""
     try:
@@ -272,27 +255,7 @@ def analyze_route():
         for point in data['route_points']:
             try:
                 # Make prediction for each point
-                input_df = pd.DataFrame([point])
-                
-                # Apply label encoding
-                for col, le in label_encoders.items():
-                    if col in input_df.columns:
-                        try:
-                            input_df[col] = le.transform(input_df[col].astype(str))
-                        except ValueError:
-                            input_df[col] = le.transform([le.classes_[-1]])[0]
-                    else:
-                        input_df[col] = 0
-                
-                # Ensure all required columns exist
-                for col in feature_columns:
-                    if col not in input_df.columns:
-                        input_df[col] = 0
-                
-                input_df = input_df[feature_columns]
-                input_df[numerical_cols] = scaler.transform(input_df[numerical_cols])
-                
-                prediction = model.predict(input_df)[0]
+                prediction = _predict(point)
                 
                 # Convert to risk level
                 risk_level = 'LOW' if prediction < 100 else 'MEDIUM' if prediction < 250 else 'HIGH'
@@ -318,5 +281,11 @@ def analyze_route():
         return jsonify({"error": str(e)}), 500
 
 
+app = Flask(__name__)
+CORS(app)  # Enable CORS for frontend requests
+app.register_blueprint(bp)
+metrics.instrument(app)
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8002, debug=True)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Single-process gateway serving every backend service from one Flask app.
+
+Mounts the prediction API (api_server.py, normally port 8000), the crime API
+(crime_api.py, port 8002) and a community API (enhanced_community_api.py, or
+community_api.py with --community simple, port 8003) as blueprints under
+their usual URLs, so clients only change host and port. Model pickles, the
+crime dataset and SQLite connections come from shared_resources and are
+loaded once for the whole process. /api/health, which every service defines,
+answers with a combined report.
+
+Usage:
+    python3 gateway.py --port 8080 --community enhanced
+"""
+
+import argparse
+import importlib
+import os
+from datetime import datetime
+
+from flask import Flask, jsonify
+from flask_cors import CORS
+
+import metrics
+import shared_resources
+
+GATEWAY_HOST = os.getenv('GATEWAY_HOST', '0.0.0.0')
+GATEWAY_PORT = int(os.getenv('GATEWAY_PORT', '8080'))
+GATEWAY_COMMUNITY_API = os.getenv('GATEWAY_COMMUNITY_API', 'enhanced')
+
+COMMUNITY_MODULES = {
+    'enhanced': 'enhanced_community_api',
+    'simple': 'community_api',
+}
+
+
+def _service_health(view):
+    """Body of a service's own health view, or the error that kept it from answering"""
+    try:
+        response = view()
+        if isinstance(response, tuple):
+            response = response[0]
+        return response.get_json()
+    except Exception as e:
+        return {"status": "unhealthy", "error": str(e)}
+
+
+def create_app(community: str = GATEWAY_COMMUNITY_API) -> Flask:
+    """Build the combined app; importing each service loads its models through the shared registry"""
+    if community not in COMMUNITY_MODULES:
+        raise ValueError(f"Unknown community API '{community}', expected one of {sorted(COMMUNITY_MODULES)}")
+
+    import api_server
+    import crime_api
+    community_api = importlib.import_module(COMMUNITY_MODULES[community])
+
+    if not api_server.model.load_models():
+        print("⚠️ Prediction models missing; /api/predict-* will fail until they are trained")
+
+    app = Flask(__name__)
+    CORS(app, expose_headers=community_api.CORS_EXPOSE_HEADERS)
+
+    # Registered before the blueprints so it wins over their own /api/health rules
+    @app.route('/api/health', methods=['GET'])
+    def health_check():
+        services = {
+            "prediction": _service_health(api_server.health_check),
+            "crime": _service_health(crime_api.health),
+            "community": _service_health(community_api.health_check),
+        }
+        healthy = all(service.get("status") == "healthy" for service in services.values())
+        return jsonify({
+            "status": "healthy" if healthy else "degraded",
+            "timestamp": datetime.now().isoformat(),
+            "services": services,
+            "shared_resources": shared_resources.stats()
+        }), 200 if healthy else 503
+
+    app.register_blueprint(api_server.bp)
+    app.register_blueprint(crime_api.bp)
+    app.register_blueprint(community_api.bp)
+    metrics.instrument(app)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve all backend APIs from one process')
+    parser.add_argument('--host', default=GATEWAY_HOST)
+    parser.add_argument('--port', type=int, default=GATEWAY_PORT)
+    parser.add_argument('--community', choices=sorted(COMMUNITY_MODULES), default=GATEWAY_COMMUNITY_API)
+    args = parser.parse_args()
+
+    app = create_app(args.community)
+    print("🚀 Starting SafeCity gateway...")
+    print("   /api/predict-crime, /api/predict-route, /api/safety-heatmap, /api/model-info - prediction API")
+    print("   /api/crime/* - crime API")
+    print("   /community/* - community API")
+    print(f"   /api/health - combined health ({args.community} community API)")
+    print("   /metrics - Prometheus request and stage metrics")
+    print(f"\n🌐 Server running on http://localhost:{args.port}")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
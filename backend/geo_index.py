@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Great-circle distance and an in-memory uniform-grid index for radius queries.
+
+Points are bucketed into fixed-size latitude/longitude cells. A radius query
+probes only the cells overlapping the circle's bounding box (or, when that box
+spans more cells than are occupied, scans the occupied cells), then keeps the
+candidates whose exact haversine distance is within the radius.
+"""
+
+import math
+import threading
+from typing import Dict, Hashable, List, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """Uniform lat/lng grid mapping cells to the items whose point falls inside them"""
+
+    def __init__(self, cell_degrees: float = 0.05):
+        self.cell_degrees = cell_degrees
+        self._lock = threading.Lock()
+        self._cells: Dict[Tuple[int, int], Dict[Hashable, tuple]] = {}
+        self._cell_of: Dict[Hashable, Tuple[int, int]] = {}
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def insert(self, key: Hashable, latitude: float, longitude: float, item=None):
+        """Add or move an item; re-inserting a key replaces its previous position"""
+        cell = self._cell(latitude, longitude)
+        with self._lock:
+            self._remove(key)
+            self._cells.setdefault(cell, {})[key] = (latitude, longitude, item)
+            self._cell_of[key] = cell
+
+    def remove(self, key: Hashable):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: Hashable):
+        cell = self._cell_of.pop(key, None)
+        if cell is not None:
+            bucket = self._cells[cell]
+            bucket.pop(key, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def query_radius(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[float, object]]:
+        """(distance_km, item) pairs within radius_km of the point, nearest first"""
+        lat_span = radius_km / KM_PER_DEGREE_LAT
+        # Longitude degrees shrink towards the poles; clamp so the span stays finite
+        lng_span = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(latitude)), 0.01))
+        min_row, min_col = self._cell(latitude - lat_span, longitude - lng_span)
+        max_row, max_col = self._cell(latitude + lat_span, longitude + lng_span)
+
+        matches = []
+        with self._lock:
+            if (max_row - min_row + 1) * (max_col - min_col + 1) <= len(self._cells):
+                buckets = [self._cells.get((row, col), {}) for row in range(min_row, max_row + 1)
+                           for col in range(min_col, max_col + 1)]
+            else:
+                # A box wider than the occupied cells: scanning what exists is cheaper than probing every cell
+                buckets = [bucket for (row, col), bucket in self._cells.items()
+                           if min_row <= row <= max_row and min_col <= col <= max_col]
+            for bucket in buckets:
+                for item_lat, item_lng, item in bucket.values():
+                    distance = haversine_km(latitude, longitude, item_lat, item_lng)
+                    if distance <= radius_km:
+                        matches.append((distance, item))
+
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"items": len(self._cell_of), "cells": len(self._cells), "cell_degrees": self.cell_degrees}
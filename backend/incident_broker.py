@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""In-process fan-out of newly reported incidents to push subscribers.
+
+Each subscriber registers a viewport (bounding box) or a centre and radius and
+gets its own bounded buffer. Publishing never blocks: a subscriber whose
+buffer is full is marked lagged and dropped, and its stream tells the client
+to resync from the read endpoints instead of holding up everyone else.
+"""
+
+import queue
+import threading
+from typing import Dict, Optional, Tuple
+
+from geo_index import haversine_km
+
+
+class Subscription:
+    """One connected client: its area of interest and bounded send buffer"""
+
+    def __init__(self, subscription_id: int, max_buffer: int,
+                 bbox: Optional[Tuple[float, float, float, float]] = None,
+                 center: Optional[Tuple[float, float]] = None, radius_km: Optional[float] = None):
+        self.id = subscription_id
+        self.bbox = bbox
+        self.center = center
+        self.radius_km = radius_km
+        self.buffer = queue.Queue(maxsize=max_buffer)
+        self.lagged = False
+        self.delivered = 0
+
+    def matches(self, latitude: Optional[float], longitude: Optional[float]) -> bool:
+        if self.bbox is None and self.center is None:
+            return True
+        if latitude is None or longitude is None:
+            return False
+        if self.bbox is not None:
+            min_lat, min_lng, max_lat, max_lng = self.bbox
+            if not (min_lat <= latitude <= max_lat and min_lng <= longitude <= max_lng):
+                return False
+        if self.center is not None:
+            return haversine_km(self.center[0], self.center[1], latitude, longitude) <= self.radius_km
+        return True
+
+    def next_event(self, timeout: float) -> Optional[Dict]:
+        """Next buffered incident, or None when timeout passes without one"""
+        try:
+            return self.buffer.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class IncidentBroker:
+    """Publishes incidents to every subscription whose area contains them"""
+
+    def __init__(self, max_buffer: int = 100, max_subscribers: int = 1000):
+        self.max_buffer = max_buffer
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[int, Subscription] = {}
+        self._next_id = 0
+        self._counters = {"published": 0, "delivered": 0, "lagged_disconnects": 0, "rejected_subscribers": 0}
+
+    def subscribe(self, bbox: Optional[Tuple[float, float, float, float]] = None,
+                  center: Optional[Tuple[float, float]] = None, radius_km: Optional[float] = None) -> Subscription:
+        """Register a subscriber; raises OverflowError when max_subscribers are already connected"""
+        with self._lock:
+            if len(self._subscriptions) >= self.max_subscribers:
+                self._counters["rejected_subscribers"] += 1
+                raise OverflowError("Too many incident subscribers")
+            self._next_id += 1
+            subscription = Subscription(self._next_id, self.max_buffer, bbox, center, radius_km)
+            self._subscriptions[subscription.id] = subscription
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.pop(subscription.id, None)
+
+    def publish(self, incident: Dict) -> int:
+        """Offer an incident to matching subscribers without blocking; returns how many got it"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.values())
+            self._counters["published"] += 1
+
+        delivered = 0
+        for subscription in subscriptions:
+            if subscription.lagged or not subscription.matches(incident.get('latitude'), incident.get('longitude')):
+                continue
+            try:
+                subscription.buffer.put_nowait(incident)
+                subscription.delivered += 1
+                delivered += 1
+            except queue.Full:
+                # The stream notices, tells the client to resync and closes
+                subscription.lagged = True
+                self.unsubscribe(subscription)
+                with self._lock:
+                    self._counters["lagged_disconnects"] += 1
+
+        with self._lock:
+            self._counters["delivered"] += delivered
+        return delivered
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscriptions),
+                "max_buffer": self.max_buffer,
+                "max_subscribers": self.max_subscribers,
+                **self._counters
+            }
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Incremental updates of the crime forest from incidents reported through the community API.
+
+Each run pulls the incidents committed to the community database since the
+last published bundle and maps them onto the feature schema of
+models/crime_model.pkl, the forest crime_api serves. It grows the forest
+with extra trees fit on that delta (warm start) and publishes the result as
+a new bundle version (see model_bundles.py). Existing trees are never refit,
+so an update costs time proportional to the delta rather than to the
+history. Progress is tracked by the community API's incident_ingest_log
+rather than by incident id: ids are handed out in blocks and bulk batches, so
+a lower id can commit after a higher one, but log seqs follow commit order.
+The manifest records the last (seq, id) consumed.
+
+Community incidents only carry a position, time, severity and category. The
+location context (lighting, road type, police distance, CCTV, jurisdiction,
+safety score, ...) comes from the nearest dataset row. Fields specific to one
+crime (victims, case status, evidence) take the dataset's typical value. The
+target, crime_count_6mo, is the nearest row's count plus the community
+incidents reported within NEIGHBOUR_RADIUS_KM over the preceding
+COUNT_WINDOW_DAYS.
+
+New trees see the delta plus a replay sample of dataset rows so they do not
+learn hot spots alone. The forest is capped at --max-trees: past it the oldest
+incremental trees are dropped, never the base ones.
+
+Usage:
+    python3 incremental_update.py --once
+    python3 incremental_update.py --interval 3600 --min-incidents 20
+"""
+
+import argparse
+import math
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import model_bundles
+from geo_index import GridIndex
+from shared_resources import datasets, models
+from train_models import prepare_frame
+
+COMMUNITY_DB_PATH = os.getenv('COMMUNITY_DB_PATH', 'safecity_community.db')
+DATASET_PATH = 'chennai_crime_dataset.csv'
+SCALER_PATH = 'models/scaler.pkl'
+ENCODERS_PATH = 'models/label_encoders.pkl'
+FEATURES_PATH = 'models/feature_columns.pkl'
+NUM_COLS_PATH = 'models/numerical_columns.pkl'
+
+NEIGHBOUR_RADIUS_KM = 1.0
+COUNT_WINDOW_DAYS = 180
+CONTEXT_SEARCH_RADII_KM = (2.0, 10.0, 50.0)
+
+ROWS_PER_TREE = 50      # one new tree per this many delta incidents
+MAX_NEW_TREES = 20
+MAX_TREES = 300
+REPLAY_RATIO = 1.0      # dataset rows replayed per delta incident
+MAX_DELTA = 5000        # incidents per run; the rest wait for the next one
+MIN_INCIDENTS = 20
+
+SEVERITY_LEVELS = {'low': 'Low', 'medium': 'Medium', 'high': 'High', 'critical': 'Critical'}
+REPORTED_BY = 'Citizen App'
+
+# Columns copied from the nearest dataset row
+LOCATION_CONTEXT = ['lighting', 'road_type', 'crime_types_in_area', 'police_distance_km', 'cctv_present',
+                    'jurisdiction', 'community_reports', 'safety_score', 'proximity_to_route_km', 'crime_count_6mo']
+# Per-crime columns community reports do not have; filled with the dataset's typical value
+INCIDENT_DEFAULTS = ['eyewitness_reports', 'victims_count', 'victims_age_group', 'victims_gender',
+                     'case_status', 'primary_evidence', 'crime_type', 'reported_by']
+
+
+class FeatureSchema:
+    """crime_api's preprocessing, vectorised over a whole frame"""
+
+    def __init__(self):
+        self.scaler = models.get(SCALER_PATH)
+        self.label_encoders = models.get(ENCODERS_PATH)
+        self.feature_columns = models.get(FEATURES_PATH)
+        self.numerical_cols = models.get(NUM_COLS_PATH)
+
+    def transform(self, frame: pd.DataFrame) -> pd.DataFrame:
+        frame = frame.copy()
+        for col, le in self.label_encoders.items():
+            if col in frame.columns:
+                # Unseen values take the last class, as crime_api does
+                mapping = {value: code for code, value in enumerate(le.classes_)}
+                frame[col] = frame[col].astype(str).map(mapping).fillna(len(le.classes_) - 1).astype(int)
+            else:
+                frame[col] = 0
+        for col in self.feature_columns:
+            if col not in frame.columns:
+                frame[col] = 0
+        frame = frame[self.feature_columns].astype(float)
+        frame[self.numerical_cols] = self.scaler.transform(frame[self.numerical_cols])
+        return frame
+
+
+class DatasetContext:
+    """The prepared crime dataset: nearest-row lookups for location context and a replay pool"""
+
+    def __init__(self, dataset_path: str, schema: FeatureSchema):
+        self.frame = prepare_frame(datasets.get(dataset_path, skiprows=1).copy())
+        self.frame = self.frame.dropna(subset=['latitude', 'longitude']).reset_index(drop=True)
+        self.replay_X = schema.transform(self.frame)
+        self.replay_y = self.frame['crime_count_6mo'].to_numpy(dtype=float)
+        self.defaults = {col: (self.frame[col].median() if self.frame[col].dtype.kind in 'if'
+                               else self.frame[col].mode().iloc[0])
+                         for col in LOCATION_CONTEXT + INCIDENT_DEFAULTS}
+        if REPORTED_BY in set(self.frame['reported_by']):
+            self.defaults['reported_by'] = REPORTED_BY
+        self.crime_types = set(self.frame['crime_type'].astype(str))
+        self.index = GridIndex(0.05)
+        for position, (lat, lng) in enumerate(zip(self.frame['latitude'], self.frame['longitude'])):
+            self.index.insert(position, lat, lng, position)
+
+    def nearest(self, latitude: float, longitude: float) -> Dict:
+        for radius in CONTEXT_SEARCH_RADII_KM:
+            matches = self.index.query_radius(latitude, longitude, radius)
+            if matches:
+                row = self.frame.iloc[matches[0][1]]
+                return {col: row[col] for col in LOCATION_CONTEXT}
+        return {col: self.defaults[col] for col in LOCATION_CONTEXT}
+
+    def replay_sample(self, size: int, rng: np.random.Generator):
+        positions = rng.choice(len(self.frame), size=min(size, len(self.frame)), replace=False)
+        return self.replay_X.iloc[positions], self.replay_y[positions]
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _parse_times(values) -> pd.Series:
+    times = pd.to_datetime(pd.Series(list(values), dtype=object), errors='coerce', format='mixed', utc=True)
+    return times.dt.tz_localize(None).fillna(pd.Timestamp.now(tz='UTC').tz_localize(None))
+
+
+def fetch_new_incidents(db_path: str, after: Tuple[int, int], limit: int = MAX_DELTA) -> List[Dict]:
+    """Located incidents committed after the (ingest seq, id) position, in commit order"""
+    conn = _connect(db_path)
+    rows = conn.execute('''
+        SELECT i.id, i.latitude, i.longitude, i.severity, i.category, i.created_at, l.seq AS ingest_seq
+        FROM incident_ingest_log l
+        JOIN incidents i ON i.id BETWEEN l.first_id AND l.last_id
+        WHERE l.seq >= ? AND (l.seq, i.id) > (?, ?)
+          AND i.latitude IS NOT NULL AND i.longitude IS NOT NULL
+        ORDER BY l.seq, i.id LIMIT ?
+    ''', (after[0], after[0], after[1], limit)).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+def _ingest_position(parent: Optional[Dict]) -> Tuple[int, int]:
+    """Where the parent bundle stopped reading the ingest log"""
+    if not parent:
+        return 0, 0
+    if 'last_ingest_seq' not in parent:
+        # Published before the log existed: everything it saw is in seq 1, the backfilled entry
+        return 1, parent['last_incident_id']
+    return parent['last_ingest_seq'], parent['last_incident_id']
+
+
+def neighbour_counts(db_path: str, incidents: List[Dict], times: pd.Series) -> List[int]:
+    """Community incidents within NEIGHBOUR_RADIUS_KM reported in the window before each incident"""
+    window_start = times.min() - timedelta(days=COUNT_WINDOW_DAYS)
+    margin = 2 * NEIGHBOUR_RADIUS_KM / 111.0
+    lats = [incident['latitude'] for incident in incidents]
+    lngs = [incident['longitude'] for incident in incidents]
+    conn = _connect(db_path)
+    rows = conn.execute('''
+        SELECT id, latitude, longitude, created_at FROM incidents
+        WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ? AND created_at >= ?
+    ''', (min(lats) - margin, max(lats) + margin, min(lngs) - margin, max(lngs) + margin,
+          window_start.strftime('%Y-%m-%d %H:%M:%S'))).fetchall()
+    conn.close()
+
+    index = GridIndex(0.02)
+    for row, reported in zip(rows, _parse_times(row['created_at'] for row in rows)):
+        index.insert(row['id'], row['latitude'], row['longitude'], reported)
+
+    counts = []
+    for incident, reported in zip(incidents, times):
+        since = reported - timedelta(days=COUNT_WINDOW_DAYS)
+        neighbours = index.query_radius(incident['latitude'], incident['longitude'], NEIGHBOUR_RADIUS_KM)
+        counts.append(sum(1 for _, other in neighbours if since <= other <= reported))
+    return counts
+
+
+def incident_frame(incidents: List[Dict], context: DatasetContext, db_path: str) -> pd.DataFrame:
+    """Community incidents as dataset rows, including the crime_count_6mo target"""
+    times = _parse_times(incident['created_at'] for incident in incidents)
+    counts = neighbour_counts(db_path, incidents, times)
+
+    records = []
+    for incident, reported, count in zip(incidents, times, counts):
+        record = context.nearest(incident['latitude'], incident['longitude'])
+        record.update({col: context.defaults[col] for col in INCIDENT_DEFAULTS})
+        category = str(incident.get('category') or '').lower()
+        if category in context.crime_types:
+            record['crime_type'] = category
+        record.update({
+            'latitude': incident['latitude'],
+            'longitude': incident['longitude'],
+            'hour_of_day': reported.hour,
+            'day_of_week': reported.dayofweek,
+            'month': reported.month,
+            'severity_level': SEVERITY_LEVELS.get(str(incident['severity']).lower(), 'Low'),
+            'community_reports': record['community_reports'] + count,
+            'crime_count_6mo': record['crime_count_6mo'] + count,
+        })
+        records.append(record)
+    return pd.DataFrame.from_records(records)
+
+
+def grow_forest(forest, X: pd.DataFrame, y: np.ndarray, new_trees: int, base_trees: int, max_trees: int) -> int:
+    """Fit new_trees extra trees on (X, y) keeping the existing ones, then enforce max_trees; returns trees dropped"""
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + new_trees)
+    forest.fit(X, y)
+    forest.set_params(warm_start=False)
+
+    excess = min(len(forest.estimators_) - max_trees, len(forest.estimators_) - base_trees)
+    if excess <= 0:
+        return 0
+    # Drop the oldest incremental trees; the base forest trained on the full dataset stays
+    forest.estimators_ = forest.estimators_[:base_trees] + forest.estimators_[base_trees + excess:]
+    forest.set_params(n_estimators=len(forest.estimators_))
+    return excess
+
+
+def run_update(db_path: str = COMMUNITY_DB_PATH, dataset_path: str = DATASET_PATH,
+               min_incidents: int = MIN_INCIDENTS, max_trees: int = MAX_TREES,
+               context: Optional[DatasetContext] = None) -> Optional[Dict]:
+    """One update pass; returns the published manifest, or None when there was not enough new data"""
+    start = time.perf_counter()
+    parent = model_bundles.read_manifest()
+    after = _ingest_position(parent)
+    incidents = fetch_new_incidents(db_path, after)
+    if len(incidents) < min_incidents:
+        print(f"⏳ {len(incidents)} new incidents since ingest #{after[0]}, waiting for {min_incidents}")
+        return None
+
+    schema = FeatureSchema()
+    context = context or DatasetContext(dataset_path, schema)
+    # Loaded privately rather than from the shared registry: the forest is modified in place
+    forest = joblib.load(model_bundles.model_path(parent))
+    base_trees = parent['base_trees'] if parent else len(forest.estimators_)
+
+    delta = incident_frame(incidents, context, db_path)
+    rng = np.random.default_rng(incidents[-1]['id'])
+    replay_X, replay_y = context.replay_sample(math.ceil(len(delta) * REPLAY_RATIO), rng)
+    X = pd.concat([schema.transform(delta), replay_X], ignore_index=True)
+    y = np.concatenate([delta['crime_count_6mo'].to_numpy(dtype=float), replay_y])
+    new_trees = min(MAX_NEW_TREES, max(1, math.ceil(len(delta) / ROWS_PER_TREE)))
+    dropped = grow_forest(forest, X, y, new_trees, base_trees, max_trees)
+
+    last_id = incidents[-1]['id']
+    manifest = {
+        "version": f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%fZ}-{last_id}",
+        "parent": parent['version'] if parent else None,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "last_ingest_seq": incidents[-1]['ingest_seq'],
+        "last_incident_id": last_id,
+        "delta_incidents": len(delta),
+        "replay_rows": len(replay_y),
+        "trees_added": new_trees,
+        "trees_dropped": dropped,
+        "base_trees": base_trees,
+        "trees": len(forest.estimators_),
+        "update_seconds": round(time.perf_counter() - start, 3),
+    }
+    model_bundles.publish(forest, manifest)
+    print(f"✅ Published bundle {manifest['version']}: {len(delta)} incidents, +{new_trees} trees "
+          f"({manifest['trees']} total) in {manifest['update_seconds']}s")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Grow the crime forest from newly reported community incidents')
+    parser.add_argument('--db', default=COMMUNITY_DB_PATH)
+    parser.add_argument('--dataset', default=DATASET_PATH)
+    parser.add_argument('--min-incidents', type=int, default=MIN_INCIDENTS)
+    parser.add_argument('--max-trees', type=int, default=MAX_TREES)
+    parser.add_argument('--once', action='store_true', help='Run a single update and exit')
+    parser.add_argument('--interval', type=float, default=3600, help='Seconds between updates')
+    args = parser.parse_args()
+
+    # Built once per process; each pass after that only touches the delta
+    context = DatasetContext(args.dataset, FeatureSchema())
+    while True:
+        run_update(args.db, args.dataset, args.min_incidents, args.max_trees, context)
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Offline load generator for the community API.
+
+Replays a weighted mix of community endpoints at a fixed request rate (open
+loop: requests are sent on schedule whether or not earlier ones finished) and
+reports throughput plus p50/p95/p99 latency overall and per endpoint. Latency
+is measured from each request's scheduled send time, so queueing inside the
+load generator counts against the server instead of hiding slow responses.
+
+Usage:
+    python3 mock_llm_server.py --latency lognormal:800:0.4 &
+    OPENAI_API_KEY=mock OPENAI_BASE_URL=http://localhost:8090/v1 python3 enhanced_community_api.py &
+    python3 load_test.py --rps 50 --duration 30
+    python3 load_test.py --mix alerts=5,route_analysis=1 --rps 100 --json results.json
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+import requests
+
+# Chennai locations used to build realistic query parameters
+LOCATIONS = [
+    (13.0827, 80.2707), (13.0418, 80.2341), (13.0569, 80.2425), (12.9716, 80.2207),
+    (13.0878, 80.2785), (13.0067, 80.2206), (13.1067, 80.2847), (12.9249, 80.1000)
+]
+
+SAMPLE_POSTS = [
+    "Street lights on the main road have been out for a week",
+    "Saw a group harassing commuters near the bus stop last night",
+    "Police patrol has improved around the market, feels safer",
+    "Two-wheeler stolen from the apartment parking, please be careful",
+]
+
+
+def _point() -> Tuple[float, float]:
+    lat, lng = random.choice(LOCATIONS)
+    return lat + random.uniform(-0.01, 0.01), lng + random.uniform(-0.01, 0.01)
+
+
+def _route() -> Dict:
+    # A small set of popular routes, so caches see realistic repetition
+    (start_lat, start_lng), (end_lat, end_lng) = random.sample(LOCATIONS[:5], 2)
+    return {"startLat": start_lat, "startLng": start_lng, "endLat": end_lat, "endLng": end_lng}
+
+
+def _location_params() -> Dict:
+    lat, lng = _point()
+    return {"lat": lat, "lng": lng, "radius": 5}
+
+
+# name -> (method, path, builder returning request kwargs)
+SCENARIOS: Dict[str, Tuple[str, str, Callable[[], Dict]]] = {
+    "alerts": ("GET", "/community/alerts", lambda: {}),
+    "discussions": ("GET", "/community/discussions", lambda: {}),
+    "stats": ("GET", "/community/stats", lambda: {}),
+    "location_alerts": ("GET", "/community/location-alerts", lambda: {"params": _location_params()}),
+    "ai_analysis": ("GET", "/community/ai-analysis", lambda: {"params": _location_params()}),
+    "route_analysis": ("POST", "/community/route-analysis", lambda: {"json": _route()}),
+    "create_discussion": ("POST", "/community/discussions", lambda: {"json": {
+        "title": "Load test discussion", "content": random.choice(SAMPLE_POSTS),
+        "author": f"loadtest-{random.randint(1, 50)}", "category": "general"}}),
+    "report_incident": ("POST", "/community/incidents", lambda: {"json": {
+        "title": "Load test incident", "description": random.choice(SAMPLE_POSTS),
+        "location": "Anna Nagar, Chennai", "severity": random.choice(["low", "medium", "high"]),
+        "reporter": "loadtest", "latitude": _point()[0], "longitude": _point()[1]}}),
+}
+
+DEFAULT_MIX = "alerts=30,discussions=20,stats=10,location_alerts=10,ai_analysis=5,route_analysis=10," \
+              "create_discussion=10,report_incident=5"
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario: {name} (choose from {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))], 2)
+
+
+class LoadTest:
+    """Open-loop load generator recording per-scenario latencies"""
+
+    def __init__(self, base_url: str, mix: Dict[str, float], rps: float, duration: float,
+                 concurrency: int, timeout: float):
+        self.base_url = base_url.rstrip('/')
+        self.mix = mix
+        self.rps = rps
+        self.duration = duration
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.latencies_ms = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.status_codes = defaultdict(int)
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _send(self, name: str, scheduled_at: float):
+        method, path, build = SCENARIOS[name]
+        try:
+            response = self._session().request(method, self.base_url + path, timeout=self.timeout, **build())
+            status = response.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        elapsed_ms = (time.perf_counter() - scheduled_at) * 1000
+
+        with self._lock:
+            self.latencies_ms[name].append(elapsed_ms)
+            self.status_codes[str(status)] += 1
+            if not isinstance(status, int) or status >= 500:
+                self.errors[name] += 1
+
+    def run(self) -> Dict:
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        total = int(self.rps * self.duration)
+        start = time.perf_counter()
+
+        for index in range(total):
+            scheduled_at = start + index / self.rps
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.executor.submit(self._send, random.choices(names, weights)[0], scheduled_at)
+
+        self.executor.shutdown(wait=True)
+        return self.report(time.perf_counter() - start)
+
+    def report(self, elapsed: float) -> Dict:
+        def summarize(latencies: List[float], errors: int) -> Dict:
+            return {
+                "requests": len(latencies),
+                "errors": errors,
+                "p50_ms": percentile(latencies, 0.50),
+                "p95_ms": percentile(latencies, 0.95),
+                "p99_ms": percentile(latencies, 0.99),
+                "max_ms": percentile(latencies, 1.0),
+            }
+
+        all_latencies = [value for values in self.latencies_ms.values() for value in values]
+        return {
+            "target_rps": self.rps,
+            "duration_s": round(elapsed, 2),
+            "throughput_rps": round(len(all_latencies) / elapsed, 2) if elapsed else 0.0,
+            "overall": summarize(all_latencies, sum(self.errors.values())),
+            "endpoints": {name: summarize(self.latencies_ms[name], self.errors[name])
+                          for name in sorted(self.latencies_ms)},
+            "status_codes": dict(self.status_codes),
+        }
+
+
+def print_report(report: Dict):
+    print(f"\n📊 {report['overall']['requests']} requests in {report['duration_s']}s — "
+          f"{report['throughput_rps']} req/s (target {report['target_rps']})")
+    print(f"   {'endpoint':<20}{'requests':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, row in [*report['endpoints'].items(), ('overall', report['overall'])]:
+        print(f"   {name:<20}{row['requests']:>9}{row['errors']:>8}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+    print(f"   status codes: {report['status_codes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a mix of community API requests at a target rate')
+    parser.add_argument('--base-url', default='http://localhost:8003')
+    parser.add_argument('--rps', type=float, default=20, help='Target requests per second')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to generate load for')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Comma-separated scenario=weight pairs')
+    parser.add_argument('--concurrency', type=int, default=200, help='Maximum requests in flight')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for a reproducible request sequence')
+    parser.add_argument('--json', dest='json_path', help='Also write the report to this file')
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    print(f"🚀 Load testing {args.base_url} at {args.rps} req/s for {args.duration}s")
+    report = LoadTest(args.base_url, parse_mix(args.mix), args.rps, args.duration,
+                      args.concurrency, args.timeout).run()
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Request and stage timing exposed as Prometheus text on /metrics.
+
+instrument(app) counts every request and records its latency per route
+template (so /community/discussions/<int:discussion_id> is one series, not one
+per id). Code paths worth separating (feature preprocessing, model inference,
+SQLite queries, upstream LLM calls, serialization) record into the stage
+histogram with `with metrics.stage('inference'):` or @metrics.timed(...).
+
+Recording is a perf_counter pair, a bisect and a short lock per observation,
+cheap enough to leave on. Series are per process: under prefork.py each
+worker reports its own counts.
+"""
+
+import bisect
+import functools
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from flask import Flask, Response, g, request
+
+# Seconds; spans sub-millisecond cache hits up to slow LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count', 'lock')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.total += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self.lock:
+            return list(self.counts), self.total, self.count
+
+
+class HistogramFamily:
+    """Histograms sharing a name and bucket layout, one per label combination"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._children: Dict[tuple, _Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        child = self._children.get(labelvalues)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(labelvalues, _Histogram(self.buckets))
+        child.observe(value)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            children = sorted(self._children.items())
+        for labelvalues, child in children:
+            counts, total, count = child.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = 'le="{}"'.format('+Inf' if bound == float('inf') else _format_value(bound))
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, labelvalues)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, labelvalues)} {count}')
+        return lines
+
+
+class CounterFamily:
+    """Monotonic counters, one per label combination"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for labelvalues, value in values:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}')
+        return lines
+
+
+REQUESTS = CounterFamily('safecity_http_requests_total', 'HTTP requests by route template, method and status',
+                         ('route', 'method', 'status'))
+REQUEST_LATENCY = HistogramFamily('safecity_http_request_duration_seconds',
+                                  'Time to build the response (up to the headers for streamed responses)',
+                                  ('route', 'method'))
+STAGE_LATENCY = HistogramFamily('safecity_stage_duration_seconds',
+                                'Time spent in one stage of handling a request', ('stage',))
+
+FAMILIES = [REQUESTS, REQUEST_LATENCY, STAGE_LATENCY]
+
+
+def observe_stage(name: str, seconds: float):
+    STAGE_LATENCY.observe(seconds, name)
+
+
+class stage:
+    """Context manager recording the time spent in its block under a stage name"""
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        STAGE_LATENCY.observe(time.perf_counter() - self.start, self.name)
+        return False
+
+
+def timed(name: str):
+    """Decorator recording every call of the function under a stage name"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                STAGE_LATENCY.observe(time.perf_counter() - start, name)
+        return wrapper
+    return decorator
+
+
+def render() -> str:
+    lines = []
+    for family in FAMILIES:
+        lines.extend(family.render())
+    return '\n'.join(lines) + '\n'
+
+
+def instrument(app: Flask) -> Flask:
+    """Time every request on app and serve the registry at /metrics"""
+    if 'safecity_metrics' in app.extensions:
+        return app
+    app.extensions['safecity_metrics'] = True
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('_metrics_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            REQUEST_LATENCY.observe(time.perf_counter() - start, route, request.method)
+            REQUESTS.inc(route, request.method, str(response.status_code))
+        return response
+
+    def metrics_view():
+        return Response(render(), content_type=CONTENT_TYPE)
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view, methods=['GET'])
+    return app
@@ -8,6 +8,8 @@ from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.model_selection import train_test_split
 import joblib
 import os
+import metrics
+from shared_resources import models
 
 class ChennaiCrimeMLModel:
     def __init__(self):
@@ -118,11 +120,11 @@ class ChennaiCrimeMLModel:
     def load_models(self):
         """Load pre-trained models"""
         try:
-            self.regressor = joblib.load('models/crime_regressor.pkl')
-            self.classifier = joblib.load('models/crime_classifier.pkl')
-            self.scaler = joblib.load('models/scaler.pkl')
-            self.label_encoders = joblib.load('models/label_encoders.pkl')
-            self.feature_columns = joblib.load('models/feature_columns.pkl')
+            self.regressor = models.get('models/crime_regressor.pkl')
+            self.classifier = models.get('models/crime_classifier.pkl')
+            self.scaler = models.get('models/scaler.pkl')
+            self.label_encoders = models.get('models/label_encoders.pkl')
+            self.feature_columns = models.get('models/feature_columns.pkl')
             self.is_trained = True
             print("✅ Models loaded successfully!")
             return True
@@ -157,25 +159,27 @@ class ChennaiCrimeMLModel:
         for key, default_value in defaults.items():
             input_data[key] = location_data.get(key, default_value)
         
-        # Encode categorical variables
-        for col, encoder in self.label_encoders.items():
-            try:
-                input_data[f'{col}_encoded'] = encoder.transform([str(input_data[col])])[0]
-            except ValueError:
-                # Use most common value if not found
-                input_data[f'{col}_encoded'] = 0
-        
-        # Create feature vector
-        feature_vector = []
-        for col in self.feature_columns:
-            feature_vector.append(input_data.get(col, 0))
-        
-        # Scale and predict
-        X_scaled = self.scaler.transform([feature_vector])
+        with metrics.stage('preprocess'):
+            # Encode categorical variables
+            for col, encoder in self.label_encoders.items():
+                try:
+                    input_data[f'{col}_encoded'] = encoder.transform([str(input_data[col])])[0]
+                except ValueError:
+                    # Use most common value if not found
+                    input_data[f'{col}_encoded'] = 0
+            
+            # Create feature vector
+            feature_vector = []
+            for col in self.feature_columns:
+                feature_vector.append(input_data.get(col, 0))
+            
+            # Scale and predict
+            X_scaled = self.scaler.transform([feature_vector])
         
         # Get predictions
-        crime_count_pred = self.regressor.predict(X_scaled)[0]
-        crime_risk_prob = self.classifier.predict_proba(X_scaled)[0]
+        with metrics.stage('inference'):
+            crime_count_pred = self.regressor.predict(X_scaled)[0]
+            crime_risk_prob = self.classifier.predict_proba(X_scaled)[0]
         
         return {
             'predicted_crime_count': round(crime_count_pred, 2),
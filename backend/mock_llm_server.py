@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Local stand-in for the OpenAI chat completions API.
+
+Answers the moderation, batch moderation, safety analysis and route analysis
+prompts sent by enhanced_community_api.py with canned JSON, after a
+configurable latency, and injects errors and malformed replies at configurable
+rates. Point the community API at it with OPENAI_BASE_URL.
+
+Usage:
+    python3 mock_llm_server.py --port 8090 --latency lognormal:600:0.5 --error-rate 0.02
+    python3 mock_llm_server.py --latency moderation=fixed:150 --latency route_analysis=uniform:2000:6000
+    OPENAI_API_KEY=mock OPENAI_BASE_URL=http://localhost:8090/v1 python3 enhanced_community_api.py
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict
+
+from flask import Flask, jsonify, request
+
+app = Flask(__name__)
+
+PROMPT_KINDS = ['moderation', 'batch_moderation', 'safety_analysis', 'route_analysis']
+
+# Words that make the mock moderator reject a post
+UNSAFE_WORDS = re.compile(r'\b(kill|murder|attack|bomb|stab|shoot)\b', re.IGNORECASE)
+
+CANNED_RESPONSES = {
+    'safety_analysis': {
+        "risk_level": "medium",
+        "risk_score": 55,
+        "top_concerns": ["Chain snatching near bus stops", "Poor street lighting", "Two-wheeler theft"],
+        "recommendations": ["Stay on well-lit main roads after dark", "Keep valuables out of sight",
+                            "Share live location when travelling late"],
+        "time_patterns": {"morning": "low", "afternoon": "low", "evening": "medium", "night": "high"}
+    },
+    'route_analysis': {
+        "route_safety_score": 72,
+        "risk_level": "medium",
+        "recent_incidents": [
+            {"type": "theft", "location": "Near the metro station exit", "time": "2 days ago",
+             "severity": "medium", "description": "Mobile phone snatched from a pedestrian"},
+            {"type": "vandalism", "location": "Bus depot underpass", "time": "5 days ago",
+             "severity": "low", "description": "Street lights damaged"}
+        ],
+        "time_analysis": {"morning": "low", "afternoon": "low", "evening": "medium", "night": "high"},
+        "safety_recommendations": ["Prefer the main road after 9 PM", "Use prepaid auto-rickshaw stands"],
+        "alternative_routes": ["Via Anna Salai main road"],
+        "user_comments": [
+            {"author": "Priya Sharma", "comment": "Well lit till the metro station, quieter after that.",
+             "rating": 4, "time_ago": "1 day ago", "sentiment": "positive", "suggests_alternative": False},
+            {"author": "Rajesh Kumar", "comment": "Avoid the underpass at night, take the main road.",
+             "rating": 2, "time_ago": "3 days ago", "sentiment": "negative", "suggests_alternative": True}
+        ],
+        "ai_confidence": 78
+    }
+}
+
+
+def parse_latency_spec(spec: str) -> Callable[[], float]:
+    """Parse fixed:MS, uniform:MIN:MAX or lognormal:MEDIAN:SIGMA into a sampler returning seconds"""
+    name, *params = spec.split(':')
+    params = [float(value) for value in params]
+    if name == 'fixed' and len(params) == 1:
+        return lambda: params[0] / 1000
+    if name == 'uniform' and len(params) == 2:
+        return lambda: random.uniform(params[0], params[1]) / 1000
+    if name == 'lognormal' and len(params) == 2:
+        # random.lognormvariate(mu, sigma) has median e^mu
+        mu = math.log(max(params[0], 1e-3))
+        return lambda: random.lognormvariate(mu, params[1]) / 1000
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+
+class MockSettings:
+    """Behaviour of the mock server, shared by all request threads"""
+
+    def __init__(self):
+        self.latency = {kind: parse_latency_spec('fixed:0') for kind in PROMPT_KINDS}
+        self.error_rate = 0.0
+        self.rate_limit_rate = 0.0
+        self.malformed_rate = 0.0
+        self.responses = dict(CANNED_RESPONSES)
+        self.lock = threading.Lock()
+        self.counters = {kind: 0 for kind in PROMPT_KINDS}
+        self.counters.update({"errors": 0, "rate_limited": 0, "malformed": 0, "prompt_tokens": 0})
+
+
+settings = MockSettings()
+
+
+def classify_prompt(system_prompt: str, prompt: str) -> str:
+    if '"verdicts"' in prompt:
+        return 'batch_moderation'
+    if 'content moderator' in system_prompt:
+        return 'moderation'
+    if 'route' in system_prompt.lower():
+        return 'route_analysis'
+    return 'safety_analysis'
+
+
+def build_response(kind: str, prompt: str) -> Dict:
+    if kind == 'moderation':
+        unsafe = UNSAFE_WORDS.search(prompt.split('Content:', 1)[-1].split('Please evaluate', 1)[0])
+        return {
+            "is_safe": not unsafe,
+            "confidence": 0.92,
+            "reasoning": "Contains violent language" if unsafe else "Relevant community safety content",
+            "suggestions": []
+        }
+
+    if kind == 'batch_moderation':
+        items = json.loads(re.search(r'(\[\{.*\}\])', prompt, re.DOTALL).group(1))
+        return {"verdicts": [
+            {
+                "id": item["id"],
+                "is_safe": not UNSAFE_WORDS.search(item["content"]),
+                "confidence": 0.92,
+                "reasoning": "Contains violent language" if UNSAFE_WORDS.search(item["content"])
+                else "Relevant community safety content",
+                "suggestions": []
+            }
+            for item in items
+        ]}
+
+    return settings.responses[kind]
+
+
+def completion_body(content: str, prompt: str) -> Dict:
+    prompt_tokens = len(prompt) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": f"chatcmpl-mock-{random.getrandbits(32):08x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "gpt-3.5-turbo",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens}
+    }
+
+
+@app.route('/v1/chat/completions', methods=['POST'])
+@app.route('/chat/completions', methods=['POST'])
+def chat_completions():
+    data = request.get_json(silent=True) or {}
+    messages = data.get('messages') or [{}]
+    system_prompt = messages[0].get('content', '') if len(messages) > 1 else ''
+    prompt = messages[-1].get('content', '')
+    kind = classify_prompt(system_prompt, prompt)
+
+    with settings.lock:
+        settings.counters[kind] += 1
+        settings.counters["prompt_tokens"] += len(prompt) // 4
+
+    time.sleep(settings.latency[kind]())
+
+    roll = random.random()
+    if roll < settings.rate_limit_rate:
+        with settings.lock:
+            settings.counters["rate_limited"] += 1
+        response = jsonify({"error": {"message": "Rate limit reached", "type": "rate_limit_error"}})
+        response.headers['Retry-After'] = '1'
+        return response, 429
+    if roll < settings.rate_limit_rate + settings.error_rate:
+        with settings.lock:
+            settings.counters["errors"] += 1
+        return jsonify({"error": {"message": "The server had an error", "type": "server_error"}}), 500
+    if roll < settings.rate_limit_rate + settings.error_rate + settings.malformed_rate:
+        with settings.lock:
+            settings.counters["malformed"] += 1
+        return jsonify(completion_body("Sorry, I can't produce JSON for that right now.", prompt))
+
+    return jsonify(completion_body(json.dumps(build_response(kind, prompt)), prompt))
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    with settings.lock:
+        return jsonify(dict(settings.counters))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock OpenAI chat completions server for offline load tests')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', action='append', default=[],
+                        help='[kind=]fixed:MS | uniform:MIN:MAX | lognormal:MEDIAN:SIGMA; repeatable, '
+                             f'kinds: {", ".join(PROMPT_KINDS)}')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of calls answered with HTTP 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of calls answered with HTTP 429')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='Fraction of calls answered with non-JSON content')
+    parser.add_argument('--responses', help='JSON file overriding the canned safety_analysis/route_analysis responses')
+    args = parser.parse_args()
+
+    for spec in args.latency:
+        kind, _, distribution = spec.rpartition('=')
+        for target in ([kind] if kind else PROMPT_KINDS):
+            if target not in PROMPT_KINDS:
+                parser.error(f"Unknown prompt kind: {target}")
+            settings.latency[target] = parse_latency_spec(distribution)
+    settings.error_rate = args.error_rate
+    settings.rate_limit_rate = args.rate_limit_rate
+    settings.malformed_rate = args.malformed_rate
+    if args.responses:
+        with open(args.responses) as f:
+            settings.responses.update(json.load(f))
+
+    print(f"🤖 Mock LLM server on http://{args.host}:{args.port}/v1 "
+          f"(errors {args.error_rate:.0%}, 429s {args.rate_limit_rate:.0%}, malformed {args.malformed_rate:.0%})")
+    print(f"   OPENAI_BASE_URL=http://{args.host}:{args.port}/v1")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
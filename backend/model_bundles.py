@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Versioned bundles of the crime forest served by crime_api.
+
+incremental_update.py writes each grown forest to models/bundles/<version>/
+and then atomically repoints models/bundle.json at it. Until a bundle is
+published the base models/crime_model.pkl is served. BundleWatcher lets a
+running service notice a new bundle without restarting.
+"""
+
+import json
+import os
+import shutil
+import time
+from typing import Dict, Optional
+
+import joblib
+
+from shared_resources import models
+
+BASE_MODEL_PATH = 'models/crime_model.pkl'
+BUNDLES_DIR = 'models/bundles'
+MANIFEST_PATH = 'models/bundle.json'
+BUNDLE_CHECK_SECONDS = float(os.getenv('MODEL_BUNDLE_CHECK_SECONDS', '30'))
+KEEP_BUNDLES = 3
+
+
+def read_manifest() -> Optional[Dict]:
+    """The current bundle's manifest, or None while only the base model exists"""
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def model_path(manifest: Optional[Dict]) -> str:
+    if manifest:
+        return os.path.join(BUNDLES_DIR, manifest['version'], 'crime_model.pkl')
+    return BASE_MODEL_PATH
+
+
+def publish(model, manifest: Dict, keep: int = KEEP_BUNDLES):
+    """Write the bundle directory, then atomically repoint the manifest at it"""
+    os.makedirs(BUNDLES_DIR, exist_ok=True)
+    staging = os.path.join(BUNDLES_DIR, f".{manifest['version']}.tmp")
+    os.makedirs(staging, exist_ok=True)
+    joblib.dump(model, os.path.join(staging, 'crime_model.pkl'))
+    os.replace(staging, os.path.dirname(model_path(manifest)))
+
+    with open(MANIFEST_PATH + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(MANIFEST_PATH + '.tmp', MANIFEST_PATH)
+
+    # Versions start with a UTC timestamp, so name order is publish order
+    versions = sorted(name for name in os.listdir(BUNDLES_DIR) if not name.startswith('.'))
+    for version in versions[:-keep] if keep > 0 else []:
+        shutil.rmtree(os.path.join(BUNDLES_DIR, version), ignore_errors=True)
+
+
+class BundleWatcher:
+    """Tracks which bundle a process serves and loads newer ones through the shared registry"""
+
+    def __init__(self, check_seconds: float = BUNDLE_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self.version = None
+        self._path = None
+        self._checked_at = 0.0
+
+    def load(self):
+        """The model of the current bundle (or the base model)"""
+        manifest = read_manifest()
+        self._path = model_path(manifest)
+        self.version = manifest['version'] if manifest else None
+        self._checked_at = time.monotonic()
+        return models.get(self._path)
+
+    def refresh(self):
+        """A newly published model, or None if nothing changed; reads the manifest at most every check_seconds"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_seconds:
+            return None
+        self._checked_at = now
+        manifest = read_manifest()
+        if (manifest['version'] if manifest else None) == self.version:
+            return None
+
+        path = model_path(manifest)
+        try:
+            model = models.get(path)
+        except FileNotFoundError:
+            # Pruned between reading the manifest and loading it; the next check retries
+            return None
+        models.discard(self._path)
+        self._path = path
+        self.version = manifest['version'] if manifest else None
+        print(f"🔄 Serving model bundle {self.version or 'base'}")
+        return model
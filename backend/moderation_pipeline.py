@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Asynchronous moderation for community content.
+
+Posts are stored as pending and submitted here; a pool of worker threads
+moderates them off the request path and hands each verdict to a callback
+that publishes or rejects the stored row. When a backlog builds up, workers
+drain up to batch_size queued items and moderate them with a single batched
+call instead of one call per item.
+
+Nothing here blocks a request thread: when the queue is full the row simply
+stays pending, and once the queue drains the workers reload pending rows
+through load_pending. A verdict that cannot be applied (e.g. the write-behind
+queue is full) is retried, and otherwise left to that same reload, as are
+items whose moderation call failed. Reloads run at most every reload_interval
+seconds so a failing upstream is not hammered.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class ModerationPipeline:
+    """Background worker pool that moderates pending items and applies verdicts"""
+
+    def __init__(self, moderate: Callable[[str, str], Dict], apply_verdict: Callable[[Dict, Dict], None],
+                 workers: int = 4, max_depth: int = 10000,
+                 moderate_batch: Optional[Callable[[List[tuple]], List[Dict]]] = None, batch_size: int = 1,
+                 load_pending: Optional[Callable[[], Iterable[Dict]]] = None, apply_attempts: int = 3,
+                 apply_backoff: float = 0.5, reload_interval: float = 5.0):
+        self.moderate = moderate
+        self.apply_verdict = apply_verdict
+        self.load_pending = load_pending
+        self.apply_attempts = apply_attempts
+        self.apply_backoff = apply_backoff
+        self.reload_interval = reload_interval
+        self.workers = workers
+        self.moderate_batch = moderate_batch
+        self.batch_size = max(1, batch_size) if moderate_batch else 1
+        self._queue = queue.Queue(maxsize=max_depth)
+        self._threads = []
+        self._latencies_ms = deque(maxlen=512)
+        self._reload_lock = threading.Lock()
+        self._reload_needed = False
+        self._last_reload = 0.0
+        self._counters = {"submitted": 0, "published": 0, "rejected": 0, "failed": 0, "batches": 0,
+                          "deferred": 0, "apply_retries": 0, "reloads": 0}
+
+    def start(self):
+        for index in range(self.workers - len(self._threads)):
+            thread = threading.Thread(target=self._run, name=f'moderation-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, item: Dict) -> bool:
+        """Queue an item (table, id, content, content_type, ...) for moderation without blocking.
+
+        Returns False when the queue is full; the item stays pending and is
+        picked up by the next reload.
+        """
+        item.setdefault('submitted_at', time.monotonic())
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._counters["deferred"] += 1
+            self._reload_needed = True
+            return False
+        self._counters["submitted"] += 1
+        return True
+
+    def stats(self) -> Dict:
+        latencies = sorted(self._latencies_ms)
+        return {
+            "mode": "async",
+            "workers": self.workers,
+            "batch_size": self.batch_size,
+            "pending": self._queue.qsize(),
+            "submit_to_verdict_ms_p50": round(latencies[len(latencies) // 2], 2) if latencies else 0.0,
+            **self._counters
+        }
+
+    def _next_batch(self) -> List[Dict]:
+        # Wait for one item, then take whatever else is already waiting; wakes up
+        # empty-handed every reload_interval so pending reloads still happen when idle
+        try:
+            batch = [self._queue.get(timeout=self.reload_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._moderate(batch)
+
+            if (self._reload_needed and self._queue.empty()
+                    and time.monotonic() - self._last_reload >= self.reload_interval):
+                self._reload()
+
+    def _moderate(self, batch: List[Dict]):
+        try:
+            if len(batch) == 1:
+                results = [self.moderate(batch[0]['content'], batch[0]['content_type'])]
+            else:
+                results = self.moderate_batch([(item['content'], item['content_type']) for item in batch])
+                self._counters["batches"] += 1
+        except Exception as e:
+            # The rows are still pending, so the next reload moderates them again
+            self._counters["failed"] += len(batch)
+            self._reload_needed = True
+            print(f"❌ Moderation of {len(batch)} item(s) failed: {e}")
+            return
+
+        for item, result in zip(batch, results):
+            self._publish(item, result)
+
+    def _publish(self, item: Dict, result: Dict):
+        for attempt in range(1, self.apply_attempts + 1):
+            try:
+                self.apply_verdict(item, result)
+                break
+            except Exception as e:
+                if attempt == self.apply_attempts:
+                    # The row is still pending, so the next reload moderates it again
+                    self._counters["failed"] += 1
+                    self._reload_needed = True
+                    print(f"❌ Applying the verdict for {item['table']} {item['id']} failed: {e}")
+                    return
+                self._counters["apply_retries"] += 1
+                time.sleep(self.apply_backoff * attempt)
+        self._counters["published" if result.get('is_safe', True) else "rejected"] += 1
+        self._latencies_ms.append((time.monotonic() - item['submitted_at']) * 1000)
+
+    def _reload(self):
+        """Re-queue rows left pending by deferred submits, failed moderation calls or failed verdicts"""
+        if self.load_pending is None or not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            self._reload_needed = False
+            self._last_reload = time.monotonic()
+            self._counters["reloads"] += 1
+            # Rows already queued or in flight may be moderated twice; verdicts only touch pending rows
+            for item in self.load_pending():
+                if not self.submit(item):
+                    break
+        except Exception as e:
+            self._reload_needed = True
+            print(f"❌ Reloading pending moderation items failed: {e}")
+        finally:
+            self._reload_lock.release()
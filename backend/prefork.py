@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Preforking production launcher for the model-serving APIs.
+
+The parent imports the service, loads its models and dataset through
+shared_resources and opens the listening socket, then forks N workers that
+all accept on that socket. Workers inherit the loaded forests and DataFrames
+and share their pages copy-on-write (gc.freeze() keeps the collector from
+dirtying them), so N workers cost little more memory than one and CPU-bound
+inference runs on N cores.
+
+Workers exit gracefully after --max-requests (plus jitter, so they do not all
+restart at once) and are replaced by a fresh fork of the parent; SIGHUP
+recycles every worker one at a time; SIGTERM/SIGINT stop the workers, giving
+in-flight requests --graceful-timeout seconds before they are killed.
+
+The community APIs are not offered here: they keep per-process state
+(incident stream subscribers, write-behind queue, in-memory alerts) that
+would diverge across workers.
+
+Usage:
+    python3 prefork.py crime --workers 4 --port 8002
+    python3 prefork.py prediction --workers 4 --max-requests 10000
+"""
+
+import argparse
+import gc
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+
+from shared_resources import datasets
+
+PREFORK_WORKERS = int(os.getenv('PREFORK_WORKERS', str(os.cpu_count() or 1)))
+PREFORK_MAX_REQUESTS = int(os.getenv('PREFORK_MAX_REQUESTS', '0'))  # 0 never recycles
+PREFORK_MAX_REQUESTS_JITTER = int(os.getenv('PREFORK_MAX_REQUESTS_JITTER', '0'))
+PREFORK_GRACEFUL_TIMEOUT = float(os.getenv('PREFORK_GRACEFUL_TIMEOUT', '30'))
+PREFORK_BACKLOG = int(os.getenv('PREFORK_BACKLOG', '2048'))
+
+
+def _load_crime():
+    import crime_api
+    datasets.get(crime_api.DATASET_PATH, skiprows=1)
+    return crime_api.app
+
+
+def _load_prediction():
+    import api_server
+    if not api_server.model.load_models():
+        raise SystemExit("❌ Failed to load model. Make sure to train it first with 'python3 ml_model.py'")
+    return api_server.app
+
+
+# service name -> (loader returning the WSGI app, default port)
+SERVICES = {
+    'crime': (_load_crime, 8002),
+    'prediction': (_load_prediction, 8000),
+}
+
+
+class _RequestCounter:
+    """WSGI middleware that asks the worker to stop once it has served its quota"""
+
+    def __init__(self, app, limit: int, on_limit):
+        self.app = app
+        self.limit = limit
+        self.on_limit = on_limit
+        self.served = 0
+
+    def __call__(self, environ, start_response):
+        self.served += 1
+        if self.limit and self.served == self.limit:
+            self.on_limit()
+        return self.app(environ, start_response)
+
+
+def _run_worker(app, listener: socket.socket, threaded: bool, max_requests: int):
+    """Serve on the inherited socket until told to stop; never returns"""
+    from werkzeug.serving import make_server
+
+    server = None
+    stopping = threading.Event()
+
+    def stop(*_):
+        if not stopping.is_set():
+            stopping.set()
+            # shutdown() waits for serve_forever to return, so it cannot run on the serving thread
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    # Ctrl-C and hangups hit the whole process group; the parent decides what happens to workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    server = make_server(listener.getsockname()[0], listener.getsockname()[1],
+                         _RequestCounter(app, max_requests, stop), threaded=threaded, fd=listener.fileno())
+    if threaded:
+        # Let in-flight requests finish when the server closes
+        server.daemon_threads = False
+        server.block_on_close = True
+    try:
+        server.serve_forever(poll_interval=0.5)
+        server.server_close()
+    finally:
+        os._exit(0)
+
+
+class Arbiter:
+    """Keeps `workers` forked children serving, replacing any that exit"""
+
+    def __init__(self, app, listener: socket.socket, workers: int, threaded: bool = False,
+                 max_requests: int = 0, max_requests_jitter: int = 0,
+                 graceful_timeout: float = PREFORK_GRACEFUL_TIMEOUT):
+        self.app = app
+        self.listener = listener
+        self.workers = workers
+        self.threaded = threaded
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.children = {}  # pid -> start time
+        self.stopping = False
+        self.recycle_requested = False
+
+    def spawn(self) -> int:
+        max_requests = self.max_requests
+        if max_requests and self.max_requests_jitter:
+            max_requests += random.randint(0, self.max_requests_jitter)
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(self.app, self.listener, self.threaded, max_requests)
+        self.children[pid] = time.monotonic()
+        return pid
+
+    def reap(self):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if pid == 0:
+                return
+            if self.children.pop(pid, None) is not None and not self.stopping:
+                code = os.waitstatus_to_exitcode(status)
+                if code != 0:
+                    print(f"⚠️ Worker {pid} exited with {code}")
+
+    def _wait_for(self, pids, timeout: float):
+        deadline = time.monotonic() + timeout
+        while any(pid in self.children for pid in pids) and time.monotonic() < deadline:
+            time.sleep(0.1)
+            self.reap()
+        for pid in pids:
+            if pid in self.children:
+                print(f"⚠️ Worker {pid} did not stop within {timeout:.0f}s, killing it")
+                self._signal(pid, signal.SIGKILL)
+        self.reap()
+
+    def _signal(self, pid: int, sig: int):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            self.children.pop(pid, None)
+
+    def recycle(self):
+        """Replace every worker one at a time, starting each replacement before stopping the old one"""
+        for pid in list(self.children):
+            self.spawn()
+            self._signal(pid, signal.SIGTERM)
+            self._wait_for([pid], self.graceful_timeout)
+
+    def stop(self):
+        self.stopping = True
+        pids = list(self.children)
+        for pid in pids:
+            self._signal(pid, signal.SIGTERM)
+        self._wait_for(pids, self.graceful_timeout)
+
+    def run(self):
+        def request_stop(*_):
+            self.stopping = True
+
+        def request_recycle(*_):
+            self.recycle_requested = True
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGHUP, request_recycle)
+
+        # Move everything loaded so far out of the collector's reach so it never writes to shared pages
+        gc.freeze()
+        try:
+            while not self.stopping:
+                self.reap()
+                while len(self.children) < self.workers and not self.stopping:
+                    self.spawn()
+                if self.recycle_requested:
+                    self.recycle_requested = False
+                    print("🔄 Recycling workers")
+                    self.recycle()
+                time.sleep(0.2)
+        finally:
+            print("🛑 Stopping workers")
+            self.stop()
+
+
+def create_listener(host: str, port: int, backlog: int = PREFORK_BACKLOG) -> socket.socket:
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(backlog)
+    listener.set_inheritable(True)
+    return listener
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a model API from preforked worker processes')
+    parser.add_argument('service', choices=sorted(SERVICES))
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, help='Defaults to the service\'s usual port')
+    parser.add_argument('--workers', type=int, default=PREFORK_WORKERS)
+    parser.add_argument('--threaded', action='store_true',
+                        help='Handle requests on threads inside each worker (for I/O-bound routes)')
+    parser.add_argument('--max-requests', type=int, default=PREFORK_MAX_REQUESTS,
+                        help='Recycle a worker after this many requests (0 disables)')
+    parser.add_argument('--max-requests-jitter', type=int, default=PREFORK_MAX_REQUESTS_JITTER)
+    parser.add_argument('--graceful-timeout', type=float, default=PREFORK_GRACEFUL_TIMEOUT)
+    args = parser.parse_args()
+
+    loader, default_port = SERVICES[args.service]
+    port = args.port or default_port
+    print(f"🤖 Loading {args.service} service...")
+    app = loader()
+    listener = create_listener(args.host, port)
+
+    print(f"🚀 Serving {args.service} on http://{args.host}:{port} with {args.workers} workers (parent pid {os.getpid()})")
+    Arbiter(app, listener, max(1, args.workers), threaded=args.threaded,
+            max_requests=args.max_requests, max_requests_jitter=args.max_requests_jitter,
+            graceful_timeout=args.graceful_timeout).run()
+    listener.close()
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Local first-pass moderation for community posts.
+
+Compiled rules flag likely abuse (threats, slurs, spam, phone numbers) for
+the LLM rather than rejecting it: crime reports legitimately quote threats
+and insults ("a man tried to stab him"), so a pattern match alone is not a
+verdict. A small TF-IDF + logistic regression classifier trained offline
+auto-approves or auto-rejects unflagged posts it is confident about. The trained weights are exported
+to a plain term table and scored in pure Python, so a decision takes tens of
+microseconds instead of a pipeline call. Everything else is escalated to
+the LLM moderator. A sample of local decisions is audited against the LLM so
+agreement can be tracked in production.
+
+Training data: seed examples below, LLM-moderated posts from the community
+database (published = safe, rejected = unsafe), and crime report descriptions
+from the dataset, which teach the model that reporting a crime is not abuse.
+
+Usage:
+    python3 premoderation.py --db safecity_community.db --dataset chennai_crime_dataset.csv
+"""
+
+import argparse
+import math
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+
+MODEL_PATH = 'models/premoderation.pkl'
+
+# Patterns that send a post to the LLM regardless of the classifier; each rule is (reason, compiled pattern)
+FLAG_RULES = [
+    ("Threat of violence", re.compile(
+        r"\b(i\s*(will|'ll|am going to|gonna)\s+(kill|stab|shoot|murder|hurt|beat)|"
+        r"(kill|stab|shoot|murder)\s+(you|him|her|them|all)|you('re| are)\s+dead)\b", re.IGNORECASE)),
+    ("Abusive language", re.compile(
+        r"\b(idiot|moron|scum|bastard|bitch|f+u+c+k+\s*(you|off)|go to hell|shut up)\b", re.IGNORECASE)),
+    ("Spam or scam", re.compile(
+        r"\b(click here|buy now|free money|earn \$?\d+|whatsapp me|work from home|crypto giveaway)\b",
+        re.IGNORECASE)),
+    ("Personal information", re.compile(r"(\+91[\s-]?)?\b[6-9]\d{9}\b|\b\d{4}\s?\d{4}\s?\d{4}\b")),
+]
+
+# Seed examples so the classifier is usable before any LLM labels exist
+SEED_SAFE = [
+    "Safe during the day, good lighting",
+    "Street lights on the main road have been out for a week",
+    "Police patrol has improved around the market, feels safer now",
+    "Two-wheeler stolen from the apartment parking, please be careful",
+    "The bus stop near the metro is crowded but well lit",
+    "Avoid the underpass after 10 PM, it is poorly lit",
+    "Chain snatching reported near the temple yesterday evening",
+    "Thanks for the update, I will take the main road instead",
+    "Is there a women's helpline number for this area?",
+    "CCTV cameras were installed near the school gate last month",
+    "Auto-rickshaw drivers at the station are helpful at night",
+    "Saw a group harassing commuters near the bus stop last night, reported to police",
+    "Good route for walking, lots of shops open till late",
+    "My phone was snatched near the signal, filed an FIR",
+    "Traffic police are present at the junction during peak hours",
+    "Please add more streetlights on the beach road",
+    "The park is safe in the morning, many walkers and joggers",
+    "House break-in reported in our colony, lock your doors",
+    "Very peaceful neighbourhood, never faced any issue",
+    "Metro station exit is well guarded, felt safe",
+    "Stray dogs near the lane can be a problem at night",
+    "Agree with the previous comment, the road is dark after 9",
+    "Neighbourhood watch meeting this Sunday at the community hall",
+    "Pickpockets are active in the crowded market area, keep bags in front",
+    "Ola and Uber pickups are easy from the main gate",
+    "Good lighting and security guards near the IT park",
+    "Someone tried to break into cars parked outside the mall",
+    "Thank you for sharing, this is really helpful",
+    "Road is under construction, pedestrians should use the other side",
+    "Women police station is close by if you need help",
+]
+
+SEED_UNSAFE = [
+    "I will kill you if I see you on this road again",
+    "You are an idiot, nobody cares about your stupid post",
+    "Click here to earn $500 a day working from home",
+    "Those people from that community are all criminals, throw them out",
+    "I know where you live, you're dead",
+    "Shut up moron, stop posting garbage",
+    "Free money crypto giveaway, whatsapp me now",
+    "Let's beat up anyone from the other area who comes here",
+    "Go to hell with your fake safety tips",
+    "We should burn down their shops tonight",
+    "This woman is a bitch, here is her address",
+    "Anyone who walks here at night deserves to get robbed",
+    "I'm going to stab the next guy who parks here",
+    "Buy now, cheap pills delivered to your door",
+    "All migrants should be attacked and chased away",
+    "Scum like you should not be allowed to post",
+    "Meet me behind the station and I'll show you what happens",
+    "Fuck off with your complaints",
+    "Let's teach them a lesson they won't forget, bring sticks",
+    "Share her phone number so we can all harass her",
+]
+
+
+def load_training_data(db_path: Optional[str] = None, dataset_path: Optional[str] = None,
+                       max_dataset_rows: int = 2000) -> Tuple[List[str], List[int]]:
+    """Collect (texts, labels) with label 1 meaning unsafe"""
+    texts = SEED_SAFE + SEED_UNSAFE
+    labels = [0] * len(SEED_SAFE) + [1] * len(SEED_UNSAFE)
+
+    if db_path and os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        for table, column in (('discussions', 'content'), ('replies', 'content'), ('route_comments', 'comment')):
+            try:
+                rows = conn.execute(f'''
+                    SELECT {column}, moderation_status FROM {table}
+                    WHERE moderation_status IN ('published', 'rejected')
+                ''').fetchall()
+            except sqlite3.OperationalError:
+                continue
+            for text, status in rows:
+                texts.append(text)
+                labels.append(1 if status == 'rejected' else 0)
+        conn.close()
+
+    if dataset_path and os.path.exists(dataset_path):
+        from shared_resources import datasets
+        # Descriptions are largely templated; duplicates would swamp the other sources
+        descriptions = datasets.get(dataset_path, skiprows=1)['sanitized_description'].dropna().astype(str).unique()
+        descriptions = descriptions[:max_dataset_rows]
+        texts.extend(descriptions)
+        labels.extend([0] * len(descriptions))
+
+    return texts, labels
+
+
+def build_classifier():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    return Pipeline([
+        ('tfidf', TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, lowercase=True)),
+        ('model', LogisticRegression(C=10.0, class_weight='balanced', max_iter=1000)),
+    ])
+
+
+class LinearTextScorer:
+    """Fitted TF-IDF + logistic regression evaluated without sklearn.
+
+    Mirrors TfidfVectorizer(sublinear_tf=True, norm='l2') with the default
+    token pattern: score = intercept + sum(weight * tfidf) / ||tfidf||.
+    """
+
+    TOKEN_PATTERN = re.compile(r'(?u)\b\w\w+\b')
+
+    def __init__(self, terms: Dict[str, Tuple[float, float]], intercept: float, ngram_range: Tuple[int, int],
+                 metadata: Optional[Dict] = None):
+        self.terms = terms  # term -> (idf, coefficient)
+        self.intercept = intercept
+        self.ngram_range = tuple(ngram_range)
+        self.metadata = metadata or {}  # decision thresholds and training metrics
+
+    @classmethod
+    def from_pipeline(cls, pipeline) -> 'LinearTextScorer':
+        vectorizer, model = pipeline.named_steps['tfidf'], pipeline.named_steps['model']
+        coefficients = model.coef_[0]
+        terms = {term: (float(vectorizer.idf_[index]), float(coefficients[index]))
+                 for term, index in vectorizer.vocabulary_.items()}
+        return cls(terms, float(model.intercept_[0]), vectorizer.ngram_range)
+
+    @classmethod
+    def load(cls, path: str) -> 'LinearTextScorer':
+        artifact = joblib.load(path)
+        return cls(artifact['terms'], artifact['intercept'], artifact['ngram_range'], artifact.get('metadata'))
+
+    def save(self, path: str):
+        joblib.dump({"terms": self.terms, "intercept": self.intercept, "ngram_range": self.ngram_range,
+                     "metadata": self.metadata}, path)
+
+    def _ngrams(self, text: str) -> List[str]:
+        tokens = self.TOKEN_PATTERN.findall(text.lower())
+        low, high = self.ngram_range
+        grams = list(tokens) if low == 1 else []
+        for n in range(max(low, 2), high + 1):
+            grams.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    def unsafe_probability(self, text: str) -> float:
+        dot = norm_sq = 0.0
+        for term, count in Counter(self._ngrams(text)).items():
+            entry = self.terms.get(term)
+            if entry is not None:
+                value = (1.0 + math.log(count)) * entry[0]
+                dot += value * entry[1]
+                norm_sq += value * value
+        z = self.intercept + (dot / math.sqrt(norm_sq) if norm_sq else 0.0)
+        return 1.0 / (1.0 + math.exp(-z))
+
+
+class PreModerator:
+    """Rules plus offline-trained classifier; returns a verdict or None to escalate to the LLM"""
+
+    def __init__(self, model_path: str = MODEL_PATH, approve_below: Optional[float] = None,
+                 reject_above: Optional[float] = None, audit_rate: float = 0.05):
+        self.audit_rate = audit_rate
+        self.classifier = None
+        if os.path.exists(model_path):
+            self.classifier = LinearTextScorer.load(model_path)
+        else:
+            print(f"⚠️ No pre-moderation model at {model_path}; running rules only")
+
+        # Thresholds default to the ones calibrated at training time
+        metadata = self.classifier.metadata if self.classifier else {}
+        self.approve_below = approve_below if approve_below is not None else metadata.get('approve_below', 0.0)
+        self.reject_above = reject_above if reject_above is not None else metadata.get('reject_above', 1.0)
+
+        self._lock = threading.Lock()
+        self._counters = {"approved": 0, "rejected": 0, "escalated": 0, "rule_flagged": 0,
+                          "audited": 0, "audit_agreed": 0, "escalated_compared": 0, "escalated_agreed": 0}
+        self._total_us = 0.0
+
+    def unsafe_probability(self, content: str) -> Optional[float]:
+        if self.classifier is None:
+            return None
+        return self.classifier.unsafe_probability(content)
+
+    def classify(self, content: str) -> Tuple[Optional[Dict], Optional[float]]:
+        """Returns (verdict or None if escalated, unsafe probability)"""
+        start = time.perf_counter()
+        verdict, probability = self._decide(content)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+
+        with self._lock:
+            self._total_us += elapsed_us
+            if verdict is None:
+                self._counters["escalated"] += 1
+            else:
+                self._counters["approved" if verdict["is_safe"] else "rejected"] += 1
+        return verdict, probability
+
+    def _decide(self, content: str) -> Tuple[Optional[Dict], Optional[float]]:
+        probability = self.unsafe_probability(content)
+        if any(pattern.search(content) for _, pattern in FLAG_RULES):
+            with self._lock:
+                self._counters["rule_flagged"] += 1
+            return None, probability
+
+        if probability is None:
+            return None, None
+        if probability < self.approve_below:
+            return self._verdict(True, 1 - probability, "Clearly appropriate (local classifier)"), probability
+        if probability > self.reject_above:
+            return self._verdict(False, probability, "Likely inappropriate (local classifier)"), probability
+        return None, probability
+
+    @staticmethod
+    def _verdict(is_safe: bool, confidence: float, reasoning: str) -> Dict:
+        return {
+            "is_safe": is_safe,
+            "confidence": round(confidence, 4),
+            "reasoning": reasoning,
+            "suggestions": [],
+            "source": "premoderation"
+        }
+
+    def should_audit(self) -> bool:
+        return random.random() < self.audit_rate
+
+    def record_audit(self, local_is_safe: bool, llm_is_safe: bool):
+        """Compare a locally decided post with the LLM verdict for the same post"""
+        with self._lock:
+            self._counters["audited"] += 1
+            self._counters["audit_agreed"] += int(local_is_safe == llm_is_safe)
+
+    def record_escalation(self, probability: Optional[float], llm_is_safe: bool):
+        """Track how often the classifier's leaning on escalated posts matches the LLM"""
+        if probability is None:
+            return
+        with self._lock:
+            self._counters["escalated_compared"] += 1
+            self._counters["escalated_agreed"] += int((probability < 0.5) == llm_is_safe)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            total_us = self._total_us
+        decided = counters["approved"] + counters["rejected"]
+        total = decided + counters["escalated"]
+        return {
+            **counters,
+            "model_loaded": self.classifier is not None,
+            "approve_below": self.approve_below,
+            "reject_above": self.reject_above,
+            "approve_rate": round(counters["approved"] / total, 4) if total else 0.0,
+            "reject_rate": round(counters["rejected"] / total, 4) if total else 0.0,
+            "escalation_rate": round(counters["escalated"] / total, 4) if total else 0.0,
+            "audit_agreement": round(counters["audit_agreed"] / counters["audited"], 4)
+            if counters["audited"] else None,
+            "escalated_agreement": round(counters["escalated_agreed"] / counters["escalated_compared"], 4)
+            if counters["escalated_compared"] else None,
+            "avg_decision_us": round(total_us / total, 1) if total else 0.0
+        }
+
+
+def choose_thresholds(probabilities: List[float], labels: List[int], target_agreement: float,
+                      min_decisions: int = 5) -> Tuple[float, float]:
+    """Widest approve/reject bands whose decisions agree with the labels at target_agreement.
+
+    A post is approved when its unsafe probability is below approve_below and
+    rejected when above reject_above; a band must cover min_decisions posts.
+    """
+    ranked = sorted(zip(probabilities, labels))
+
+    approve_below = 0.0
+    safe = 0
+    for count, (probability, label) in enumerate(ranked, start=1):
+        safe += int(label == 0)
+        if count >= min_decisions and safe / count >= target_agreement:
+            approve_below = probability + 1e-9
+
+    reject_above = 1.0
+    unsafe = 0
+    for count, (probability, label) in enumerate(reversed(ranked), start=1):
+        unsafe += int(label == 1)
+        if count >= min_decisions and unsafe / count >= target_agreement:
+            reject_above = probability - 1e-9
+
+    return approve_below, max(reject_above, approve_below)
+
+
+def evaluate(probabilities: List[float], labels: List[int], approve_below: float, reject_above: float) -> Dict:
+    """Decision rates and agreement with the labels (LLM verdicts) for out-of-fold predictions"""
+    approved = rejected = correct = 0
+    for probability, label in zip(probabilities, labels):
+        if probability < approve_below:
+            approved += 1
+            correct += int(label == 0)
+        elif probability > reject_above:
+            rejected += 1
+            correct += int(label == 1)
+    decided = approved + rejected
+    return {
+        "posts": len(labels),
+        "approve_rate": round(approved / len(labels), 4),
+        "reject_rate": round(rejected / len(labels), 4),
+        "escalation_rate": round(1 - decided / len(labels), 4),
+        "decided_agreement": round(correct / decided, 4) if decided else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the local pre-moderation classifier')
+    parser.add_argument('--db', default='safecity_community.db', help='Community DB with LLM-moderated posts')
+    parser.add_argument('--dataset', default='chennai_crime_dataset.csv', help='Crime dataset (benign examples)')
+    parser.add_argument('--output', default=MODEL_PATH)
+    parser.add_argument('--target-agreement', type=float, default=0.98,
+                        help='Required agreement with LLM labels for auto-decided posts')
+    args = parser.parse_args()
+
+    from sklearn.model_selection import StratifiedKFold, cross_val_predict
+
+    print("🔄 Loading moderation training data...")
+    texts, labels = load_training_data(args.db, args.dataset)
+    print(f"   {len(texts)} posts ({sum(labels)} unsafe)")
+
+    # Out-of-fold probabilities calibrate the thresholds without scoring training posts
+    folds = StratifiedKFold(n_splits=max(2, min(5, sum(labels), len(labels) - sum(labels))), shuffle=True,
+                            random_state=42)
+    probabilities = cross_val_predict(build_classifier(), texts, labels, cv=folds, method='predict_proba')[:, 1]
+    approve_below, reject_above = choose_thresholds(list(probabilities), labels, args.target_agreement)
+    report = evaluate(probabilities, labels, approve_below, reject_above)
+    print(f"📊 Out-of-fold: approve {report['approve_rate']:.1%}, reject {report['reject_rate']:.1%}, "
+          f"escalate {report['escalation_rate']:.1%}, agreement on decided posts {report['decided_agreement']}")
+    print(f"   Thresholds: approve below {approve_below:.3f}, reject above {reject_above:.3f}")
+
+    # Final model uses every labelled post
+    scorer = LinearTextScorer.from_pipeline(build_classifier().fit(texts, labels))
+    scorer.metadata = {"approve_below": approve_below, "reject_above": reject_above,
+                       "target_agreement": args.target_agreement, "evaluation": report}
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    scorer.save(args.output)
+    print(f"💾 Pre-moderation model saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
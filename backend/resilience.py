@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Guards for slow or failing upstream calls.
+
+CircuitBreaker stops calling an upstream after consecutive failures and lets
+a single probe through once the reset timeout has passed (half-open).
+LatencyBudget runs a call on a bounded thread pool and stops waiting when the
+caller's budget is spent; the call itself keeps running, so whatever it
+caches on completion is there for the next request.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+
+class BudgetExceeded(TimeoutError):
+    """Raised when a call does not finish within its latency budget"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open probing"""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._counters = {"opened": 0, "short_circuited": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; in half-open state only one probe is let through"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+
+            self._counters["short_circuited"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._counters["opened"] += 1
+                    print(f"⚠️ Circuit '{self.name}' opened after {self._failures} consecutive failure(s)")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout_s": self.reset_timeout,
+            **self._counters
+        }
+
+
+class LatencyBudget:
+    """Runs calls on a bounded pool and gives up waiting once the budget is spent"""
+
+    def __init__(self, workers: int = 8):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='llm-budget')
+        self._counters = {"within_budget": 0, "exceeded": 0, "finished_after_budget": 0}
+
+    def run(self, fn: Callable[[], Any], budget_seconds: float) -> Any:
+        """Return fn()'s result, or raise BudgetExceeded after budget_seconds while fn keeps running"""
+        future = self._executor.submit(fn)
+        try:
+            result = future.result(timeout=budget_seconds)
+        except FutureTimeout:
+            self._counters["exceeded"] += 1
+            future.add_done_callback(self._finished_late)
+            raise BudgetExceeded(f"Call exceeded its {budget_seconds:.1f}s budget")
+        self._counters["within_budget"] += 1
+        return result
+
+    def _finished_late(self, future):
+        if future.exception() is None:
+            self._counters["finished_after_budget"] += 1
+
+    def stats(self) -> Dict:
+        return dict(self._counters)
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Per-cell crime risk profiles aggregated offline from the crime dataset.
+
+The build step buckets every incident in chennai_crime_dataset.csv into a
+fine and a coarse lat/lng grid and stores, per cell, the incident count,
+severity mix, top crime types, hour-of-day histogram and a risk score ranked
+against the other cells. At serve time a location maps to its cell key and
+the precomputed analysis is a dictionary lookup, falling back to the coarse
+cell and then the city-wide profile where data is sparse.
+
+Each cell, jurisdiction and the city also get a 24-hour risk curve: the
+severity-weighted hourly histogram, smoothed across neighbouring hours and
+shrunk towards the parent curve (cell -> jurisdiction -> city) so sparse cells
+do not swing on a handful of reports. Curves are stored as 48 hex characters
+(one byte per hour) and bucketed into morning/afternoon/evening/night at load.
+
+Usage:
+    python3 risk_profiles.py --dataset chennai_crime_dataset.csv --output models/risk_profiles.json
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+from collections import Counter
+from typing import Dict, List, Optional
+
+PROFILES_PATH = 'models/risk_profiles.json'
+DATASET_PATH = 'chennai_crime_dataset.csv'
+
+FINE_CELL_DEGREES = 0.02     # ~2.2 km
+COARSE_CELL_DEGREES = 0.05   # ~5.5 km
+MIN_CELL_INCIDENTS = 3       # fewer than this and the coarser profile is used
+CURVE_PRIOR_WEIGHT = 10.0    # severity-weighted reports' worth of pull towards the parent curve
+
+# Hours belonging to each time-of-day bucket reported by the analyses
+TIME_BUCKETS = {
+    "morning": range(6, 12),
+    "afternoon": range(12, 17),
+    "evening": range(17, 21),
+    "night": [21, 22, 23, 0, 1, 2, 3, 4, 5],
+}
+
+SEVERITY_WEIGHTS = {'Low': 1, 'Medium': 2, 'High': 3, 'Critical': 4}
+
+BASE_RECOMMENDATIONS = [
+    "Stay alert and aware of your surroundings",
+    "Avoid isolated areas, especially at night",
+    "Keep valuables secure and out of sight",
+    "Report suspicious activity to local authorities",
+    "Use well-lit and populated routes when possible"
+]
+
+CRIME_RECOMMENDATIONS = {
+    'theft': "Keep phones and bags on the side away from the road",
+    'robbery': "Avoid displaying cash or jewellery, especially near ATMs",
+    'burglary': "Lock doors and windows and keep entrances lit",
+    'assault': "Travel with others after dark and share your live location",
+    'eve_teasing': "Prefer crowded, well-lit streets and report harassment to 181 / 100",
+    'scam': "Verify callers and never share OTPs or bank details",
+}
+
+
+def cell_key(latitude: float, longitude: float, cell_degrees: float) -> str:
+    return f"{math.floor(latitude / cell_degrees)}_{math.floor(longitude / cell_degrees)}"
+
+
+def _risk_level(score: int) -> str:
+    if score >= 70:
+        return 'high'
+    if score >= 40:
+        return 'medium'
+    return 'low'
+
+
+def _profile(group) -> Dict:
+    severity = Counter(group['severity_level'])
+    hours = [0] * 24
+    for hour, count in Counter(group['hour']).items():
+        hours[int(hour)] = count
+    weighted_hours = [0] * 24
+    for hour, level in zip(group['hour'], group['severity_level']):
+        weighted_hours[int(hour)] += SEVERITY_WEIGHTS.get(level, 1)
+    crime_types = Counter(group['crime_type'])
+    return {
+        "incidents": int(len(group)),
+        "severity": {level: int(severity.get(level, 0)) for level in SEVERITY_WEIGHTS},
+        "top_crime_types": [[crime, int(count)] for crime, count in crime_types.most_common(3)],
+        "hours": hours,
+        "weighted_hours": weighted_hours,
+        "jurisdiction": Counter(group['jurisdiction']).most_common(1)[0][0],
+        "mean_severity": round(sum(SEVERITY_WEIGHTS.get(level, 1) * count for level, count in severity.items())
+                               / len(group), 3),
+    }
+
+
+def _rank(values: List[float], value: float) -> float:
+    """Fraction of values below this one (ties share the lower rank)"""
+    return sum(1 for other in values if other < value) / max(len(values) - 1, 1)
+
+
+def _score(profiles: Dict[str, Dict]):
+    """Risk score 0-100: incident density and mean severity, each ranked against the other cells"""
+    counts = [profile["incidents"] for profile in profiles.values()]
+    severities = [profile["mean_severity"] for profile in profiles.values()]
+    for profile in profiles.values():
+        profile["risk_score"] = int(round(100 * (0.5 * _rank(counts, profile["incidents"])
+                                                 + 0.5 * _rank(severities, profile["mean_severity"]))))
+        profile["risk_level"] = _risk_level(profile["risk_score"])
+
+
+def _hour_shares(weighted_hours: List[float], prior: Optional[List[float]]) -> List[float]:
+    """Smoothed share of weighted risk per hour, shrunk towards the prior shares"""
+    smoothed = [0.25 * weighted_hours[hour - 1] + 0.5 * weighted_hours[hour] + 0.25 * weighted_hours[(hour + 1) % 24]
+                for hour in range(24)]
+    prior = prior or [1 / 24] * 24
+    total = sum(smoothed) + CURVE_PRIOR_WEIGHT
+    return [(smoothed[hour] + CURVE_PRIOR_WEIGHT * prior[hour]) / total for hour in range(24)]
+
+
+def _set_curve(profile: Dict, prior: Optional[List[float]]) -> List[float]:
+    """Store the profile's hourly risk curve (0-100 per hour, as hex) and return its hour shares.
+
+    An hour with the average share scores the profile's risk score; busier hours
+    score up to 1.5x that and quieter ones down to 0.5x.
+    """
+    shares = _hour_shares(profile.pop("weighted_hours"), prior)
+    curve = [min(100, int(round(profile["risk_score"] * (0.5 + 0.5 * 24 * share)))) for share in shares]
+    profile["curve"] = bytes(curve).hex()
+    return shares
+
+
+def decode_curve(curve: str) -> List[int]:
+    return list(bytes.fromhex(curve))
+
+
+def time_patterns(curve: List[float]) -> Dict:
+    """Bucket an hourly curve into the morning/afternoon/evening/night shape the analyses return"""
+    patterns = {}
+    for name, hours in TIME_BUCKETS.items():
+        score = int(round(sum(curve[hour] for hour in hours) / len(hours)))
+        patterns[name] = {"risk": _risk_level(score), "score": score}
+    return patterns
+
+
+def build_profiles(dataset_path: str = DATASET_PATH, fine_degrees: float = FINE_CELL_DEGREES,
+                   coarse_degrees: float = COARSE_CELL_DEGREES) -> Dict:
+    """Aggregate the dataset into {fine, coarse, city} profile tables"""
+    import pandas as pd
+    from shared_resources import datasets
+
+    with open(dataset_path, 'rb') as f:
+        dataset_hash = hashlib.sha256(f.read()).hexdigest()
+
+    # dropna copies, so the shared frame is left untouched
+    df = datasets.get(dataset_path, skiprows=1)
+    df = df.dropna(subset=['latitude', 'longitude', 'reported_datetime'])
+    df['hour'] = pd.to_datetime(df['reported_datetime']).dt.hour
+    df['fine'] = [cell_key(lat, lng, fine_degrees) for lat, lng in zip(df['latitude'], df['longitude'])]
+    df['coarse'] = [cell_key(lat, lng, coarse_degrees) for lat, lng in zip(df['latitude'], df['longitude'])]
+
+    tables = {}
+    for level in ('fine', 'coarse', 'jurisdiction'):
+        tables[level] = {key: _profile(group) for key, group in df.groupby(level)}
+        _score(tables[level])
+
+    # The city as a whole sits at the median of its cells
+    city = _profile(df)
+    city["risk_score"] = 50
+    city["risk_level"] = _risk_level(city["risk_score"])
+
+    # Curves shrink towards their parent: city <- jurisdiction <- cell
+    city_shares = _set_curve(city, None)
+    jurisdiction_shares = {name: _set_curve(profile, city_shares)
+                           for name, profile in tables['jurisdiction'].items()}
+    for level in ('fine', 'coarse'):
+        for profile in tables[level].values():
+            _set_curve(profile, jurisdiction_shares.get(profile["jurisdiction"], city_shares))
+
+    return {
+        "version": dataset_hash[:12],
+        "fine_cell_degrees": fine_degrees,
+        "coarse_cell_degrees": coarse_degrees,
+        "min_cell_incidents": MIN_CELL_INCIDENTS,
+        "fine": tables['fine'],
+        "coarse": tables['coarse'],
+        "jurisdictions": tables['jurisdiction'],
+        "city": city,
+    }
+
+
+def location_analysis(profile: Dict) -> Dict:
+    """Shape a profile like the LLM safety analysis (risk_level, risk_score, top_concerns, recommendations)"""
+    incidents = profile["incidents"]
+    top_concerns = [f"{crime.replace('_', ' ').title()} ({count / incidents:.0%} of reported incidents)"
+                    for crime, count in profile["top_crime_types"]]
+    serious = profile["severity"].get('High', 0) + profile["severity"].get('Critical', 0)
+    if serious:
+        top_concerns.append(f"{serious / incidents:.0%} of incidents rated high or critical severity")
+
+    recommendations = [CRIME_RECOMMENDATIONS[crime] for crime, _ in profile["top_crime_types"]
+                       if crime in CRIME_RECOMMENDATIONS]
+    recommendations += BASE_RECOMMENDATIONS[:5 - min(len(recommendations), 3)]
+
+    curve = decode_curve(profile["curve"])
+    return {
+        "risk_level": profile["risk_level"],
+        "risk_score": profile["risk_score"],
+        "top_concerns": top_concerns,
+        "recommendations": recommendations,
+        "time_patterns": {**time_patterns(curve), "hourly": curve},
+        "incidents_in_area": incidents,
+        "jurisdiction": profile["jurisdiction"],
+    }
+
+
+class RiskProfileTable:
+    """Precomputed per-cell analyses; lookups are a couple of dictionary gets"""
+
+    def __init__(self, table: Dict):
+        self.version = table["version"]
+        self.fine_degrees = table["fine_cell_degrees"]
+        self.coarse_degrees = table["coarse_cell_degrees"]
+        min_incidents = table.get("min_cell_incidents", MIN_CELL_INCIDENTS)
+
+        # Analyses are shaped once here, not per request
+        self._fine = {key: {**location_analysis(profile), "resolution": "cell"}
+                      for key, profile in table["fine"].items() if profile["incidents"] >= min_incidents}
+        self._coarse = {key: {**location_analysis(profile), "resolution": "area"}
+                        for key, profile in table["coarse"].items() if profile["incidents"] >= min_incidents}
+        self._city = {**location_analysis(table["city"]), "resolution": "city"}
+        self._jurisdictions = {name: {**location_analysis(profile), "resolution": "jurisdiction"}
+                               for name, profile in table.get("jurisdictions", {}).items()}
+        self.profiles = table
+
+    @classmethod
+    def load(cls, path: str = PROFILES_PATH, dataset_path: Optional[str] = DATASET_PATH) -> Optional['RiskProfileTable']:
+        """Load the built table, building it in-process from the dataset if it has not been built"""
+        if os.path.exists(path):
+            with open(path) as f:
+                return cls(json.load(f))
+        if dataset_path and os.path.exists(dataset_path):
+            print(f"⚠️ No risk profile table at {path}; building it from {dataset_path}")
+            return cls(build_profiles(dataset_path))
+        print(f"⚠️ No risk profile table at {path} and no dataset to build it from")
+        return None
+
+    def lookup(self, latitude: float, longitude: float) -> Dict:
+        """Analysis for the cell containing the point, widening to the area and city where data is sparse"""
+        return (self._fine.get(cell_key(latitude, longitude, self.fine_degrees))
+                or self._coarse.get(cell_key(latitude, longitude, self.coarse_degrees))
+                or self._city)
+
+    def jurisdiction(self, name: str) -> Dict:
+        return self._jurisdictions.get(name, self._city)
+
+    def route_time_analysis(self, start_lat: float, start_lng: float, end_lat: float, end_lng: float,
+                            max_samples: int = 50) -> Dict:
+        """Time-of-day buckets for a route: the mean hourly curve of the cells along the straight line"""
+        steps = max(1, min(max_samples - 1, int(max(abs(end_lat - start_lat), abs(end_lng - start_lng))
+                                                / (self.fine_degrees / 2))))
+        curves = [self.lookup(start_lat + (end_lat - start_lat) * step / steps,
+                              start_lng + (end_lng - start_lng) * step / steps)["time_patterns"]["hourly"]
+                  for step in range(steps + 1)]
+        curve = [sum(values) / len(values) for values in zip(*curves)]
+        return time_patterns(curve)
+
+    def stats(self) -> Dict:
+        return {"version": self.version, "cells": len(self._fine), "areas": len(self._coarse),
+                "jurisdictions": len(self._jurisdictions)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aggregate the crime dataset into per-cell risk profiles')
+    parser.add_argument('--dataset', default=DATASET_PATH)
+    parser.add_argument('--output', default=PROFILES_PATH)
+    parser.add_argument('--cell-degrees', type=float, default=FINE_CELL_DEGREES)
+    parser.add_argument('--coarse-cell-degrees', type=float, default=COARSE_CELL_DEGREES)
+    args = parser.parse_args()
+
+    print(f"🔄 Aggregating {args.dataset}...")
+    table = build_profiles(args.dataset, args.cell_degrees, args.coarse_cell_degrees)
+    print(f"📊 {table['city']['incidents']} incidents -> {len(table['fine'])} cells, {len(table['coarse'])} areas "
+          f"(dataset {table['version']})")
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(table, f, separators=(',', ':'), sort_keys=True)
+    print(f"💾 Risk profiles saved to {args.output} ({os.path.getsize(args.output) / 1024:.1f} KB)")
+
+
+if __name__ == '__main__':
+    main()
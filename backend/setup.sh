@@ -36,7 +36,7 @@ echo "✅ Setup complete!"
 echo ""
 echo "To run the analysis:"
 echo "1. Make sure you have 'chennai_crime_dataset.csv' in the backend/ directory"
-echo "2. Run: python3 cpaa_fixed.py"
+echo "2. Run: python3 train_models.py"
 echo ""
 echo "To activate the virtual environment in the future:"
 echo "source crime_analysis_env/bin/activate"
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Process-wide registries for model artifacts, datasets and SQLite connections.
+
+The backend services look their pickles, CSVs and database handles up here
+instead of loading them themselves, so when several services run in one
+process (gateway.py) each artifact is loaded once and shared. Everything
+handed out is shared: callers must treat models and DataFrames as read-only.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+import metrics
+
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '8'))
+
+
+class ModelRegistry:
+    """joblib artifacts loaded once per path"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._artifacts: Dict[str, object] = {}
+        self._counters = {"loads": 0, "hits": 0}
+
+    def get(self, path: str):
+        """The artifact stored at path; raises FileNotFoundError if it does not exist"""
+        key = os.path.abspath(path)
+        with self._lock:
+            if key in self._artifacts:
+                self._counters["hits"] += 1
+                return self._artifacts[key]
+            # Loading under the lock keeps concurrent first requests from unpickling twice
+            import joblib
+            artifact = joblib.load(path)
+            self._artifacts[key] = artifact
+            self._counters["loads"] += 1
+            return artifact
+
+    def discard(self, path: str):
+        """Forget an artifact that has been superseded so its memory can be reclaimed"""
+        with self._lock:
+            self._artifacts.pop(os.path.abspath(path), None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"artifacts": len(self._artifacts), **self._counters}
+
+
+class DatasetStore:
+    """CSV files read once and re-read only when the file changes on disk"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frames: Dict[tuple, tuple] = {}
+        self._counters = {"loads": 0, "hits": 0}
+
+    def get(self, path: str, **read_csv_kwargs):
+        """The DataFrame for path, parsed with read_csv_kwargs; shared, so never modify it in place"""
+        key = (os.path.abspath(path), tuple(sorted(read_csv_kwargs.items())))
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._frames.get(key)
+            if cached and cached[0] == mtime:
+                self._counters["hits"] += 1
+                return cached[1]
+            import pandas as pd
+            frame = pd.read_csv(path, **read_csv_kwargs)
+            self._frames[key] = (mtime, frame)
+            self._counters["loads"] += 1
+            return frame
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"datasets": len(self._frames), **self._counters}
+
+
+class _TimedCursor:
+    """sqlite3.Cursor proxy recording statement and fetch time as metrics stages"""
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, sql: str, parameters=()):
+        with metrics.stage('db_query'):
+            self._cursor.execute(sql, parameters)
+        return self
+
+    def executemany(self, sql: str, seq_of_parameters):
+        with metrics.stage('db_query'):
+            self._cursor.executemany(sql, seq_of_parameters)
+        return self
+
+    def fetchone(self):
+        with metrics.stage('db_fetch'):
+            return self._cursor.fetchone()
+
+    def fetchmany(self, *args):
+        with metrics.stage('db_fetch'):
+            return self._cursor.fetchmany(*args)
+
+    def fetchall(self):
+        with metrics.stage('db_fetch'):
+            return self._cursor.fetchall()
+
+
+class PooledConnection:
+    """sqlite3.Connection proxy whose close() hands the connection back to its pool"""
+
+    def __init__(self, pool: 'SQLitePool', conn: sqlite3.Connection):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self) -> _TimedCursor:
+        return _TimedCursor(self._conn.cursor())
+
+    def execute(self, sql: str, parameters=()) -> _TimedCursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters) -> _TimedCursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self._conn.__exit__(*exc_info)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+
+class SQLitePool:
+    """Keeps up to `size` idle connections to one database file.
+
+    connect() never blocks: when no idle connection is available a new one is
+    opened, and connections returned beyond `size` are closed. The pool is
+    emptied in a forked child, since SQLite connections must not cross fork().
+    """
+
+    def __init__(self, path: str, size: int = DB_POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._lock = threading.Lock()
+        self._idle: List[sqlite3.Connection] = []
+        self._pid = os.getpid()
+        self._counters = {"opened": 0, "reused": 0}
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            self._idle = []
+            self._pid = os.getpid()
+
+    def connect(self) -> PooledConnection:
+        with self._lock:
+            self._check_pid()
+            if self._idle:
+                self._counters["reused"] += 1
+                return PooledConnection(self, self._idle.pop())
+            self._counters["opened"] += 1
+        return PooledConnection(self, sqlite3.connect(self.path, check_same_thread=False))
+
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self._check_pid()
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"path": self.path, "idle": len(self._idle), "size": self.size, **self._counters}
+
+
+_pools: Dict[str, SQLitePool] = {}
+_pools_lock = threading.Lock()
+
+
+def db_pool(path: str, size: Optional[int] = None) -> SQLitePool:
+    """The shared pool for a database file, created on first use"""
+    key = os.path.abspath(path)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = SQLitePool(path, size or DB_POOL_SIZE)
+        return _pools[key]
+
+
+models = ModelRegistry()
+datasets = DatasetStore()
+
+
+def stats() -> Dict:
+    with _pools_lock:
+        pools = [pool.stats() for pool in _pools.values()]
+    return {"models": models.stats(), "datasets": datasets.stats(), "db_pools": pools}
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# Tests for the write-behind queue under backpressure
+
+import queue
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from write_behind import WriteBehindQueue
+
+
+def _insert(value):
+    def apply(cursor):
+        cursor.execute('INSERT INTO items (value) VALUES (?)', (value,))
+    return apply
+
+
+@pytest.fixture
+def write_queue(tmp_path):
+    db_path = str(tmp_path / 'write_behind.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, value TEXT)')
+    conn.commit()
+    conn.close()
+    # Writer not started yet, so a single queued write fills the queue
+    wq = WriteBehindQueue(lambda: sqlite3.connect(db_path, check_same_thread=False), max_depth=1)
+    yield wq
+    wq.stop()
+
+
+def test_blocked_submit_does_not_stall_fail_fast_submits(write_queue):
+    first = write_queue.submit(_insert('first'))
+
+    blocked = {}
+    waiter = threading.Thread(target=lambda: blocked.update(seq=write_queue.submit(_insert('waiting'), timeout=5)))
+    waiter.start()
+    time.sleep(0.1)
+
+    start = time.monotonic()
+    with pytest.raises(queue.Full):
+        write_queue.submit(_insert('rejected'))
+    assert time.monotonic() - start < 0.1
+
+    # The rejected write must not have taken a sequence number
+    assert write_queue.status(first + 1) == {"status": "unknown"}
+
+    write_queue.start()
+    waiter.join(5)
+    assert blocked['seq'] == first + 1
+    assert write_queue.wait_for(blocked['seq'], 2)
+    assert write_queue.status(first) == {"status": "committed"}
+    assert write_queue.status(blocked['seq']) == {"status": "committed"}
+
+
+def test_submit_with_timeout_raises_when_queue_stays_full(write_queue):
+    first = write_queue.submit(_insert('first'))
+
+    start = time.monotonic()
+    with pytest.raises(queue.Full):
+        write_queue.submit(_insert('late'), timeout=0.2)
+    assert 0.2 <= time.monotonic() - start < 1.0
+    assert write_queue.status(first + 1) == {"status": "unknown"}
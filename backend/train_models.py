@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Training CLI for the crime forest served by crime_api, with a parallel hyperparameter search.
+
+Features are built once per dataset, the same way cpaa.py built them (label
+encoding, hour/day/month from reported_datetime, StandardScaler over the
+numerical columns), and cached in models/feature_cache/ under the dataset's
+SHA-256. Later runs on an unchanged dataset skip the build entirely.
+
+The search fits one random forest per combination of --trees, --depth and
+--min-leaf across a process pool. For every candidate it records the
+held-out score (R2/MAE/RMSE for the crime_count_6mo regressor, accuracy/F1
+for the High/Low crime-level classifier), the fit time, the single-row
+predict latency as crime_api sees it, per-row batch latency and the pickled
+size. Candidates no other candidate beats on both score and latency are
+marked as the latency/accuracy frontier. The full table goes to
+--report.
+
+--save writes the best candidate within --max-latency-ms, along with its
+preprocessing artifacts, to the paths crime_api loads.
+
+Usage:
+    python3 train_models.py --trees 50,100,200 --depth none,10,20 --min-leaf 1,2,5 --jobs 4
+    python3 train_models.py --task classification
+    python3 train_models.py --save --max-latency-ms 15
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.metrics import accuracy_score, f1_score, mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+import model_bundles
+
+DATASET_PATH = 'chennai_crime_dataset.csv'
+FEATURE_CACHE_DIR = 'models/feature_cache'
+REPORT_PATH = 'models/training_report.json'
+SCALER_PATH = 'models/scaler.pkl'
+ENCODERS_PATH = 'models/label_encoders.pkl'
+FEATURES_PATH = 'models/feature_columns.pkl'
+NUM_COLS_PATH = 'models/numerical_columns.pkl'
+
+# Bump when build_features changes so stale caches are not reused
+FEATURES_VERSION = 1
+
+TARGET = 'crime_count_6mo'
+DROP_COLUMNS = ['crime_id', 'reported_datetime', 'road_name', 'road_segment_id',
+                'affected_route_id', 'affected_segments', 'sanitized_description']
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
+DEFAULT_TREES = '50,100,200'
+DEFAULT_DEPTHS = 'none,10,20'
+DEFAULT_MIN_LEAF = '1,2,5'
+LATENCY_SAMPLES = 50    # single-row predictions timed per candidate
+
+TASKS = {
+    'regression': RandomForestRegressor,
+    'classification': RandomForestClassifier,
+}
+
+
+def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """The cleaning cpaa.py applied before training crime_model.pkl"""
+    df = df.fillna({
+        'lighting': 'Unknown',
+        'road_type': 'Unknown',
+        'victims_age_group': 'Unknown',
+        'victims_gender': 'Unknown',
+        'severity_level': 'Low',
+        'case_status': 'Open',
+        'primary_evidence': 'None',
+        'jurisdiction': 'Unknown',
+        'reported_by': 'Public',
+        'community_reports': 0,
+        'safety_score': 5.0
+    })
+    df['cctv_present'] = df['cctv_present'].map({'Yes': 1, 'No': 0}).fillna(0)
+    reported = pd.to_datetime(df['reported_datetime'])
+    df['hour_of_day'] = reported.dt.hour
+    df['day_of_week'] = reported.dt.dayofweek
+    df['month'] = reported.dt.month
+    return df
+
+
+def dataset_hash(dataset_path: str) -> str:
+    with open(dataset_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def build_features(dataset_path: str) -> Dict:
+    """Encoded, scaled feature matrix plus both targets and a fixed train/test split"""
+    df = prepare_frame(pd.read_csv(dataset_path, skiprows=1))
+    df = df.drop(columns=[col for col in DROP_COLUMNS if col in df.columns])
+
+    categorical_cols = df.select_dtypes(include=['object', 'string']).columns.tolist()
+    numerical_cols = [col for col in df.select_dtypes(include=['int64', 'float64']).columns if col != TARGET]
+
+    label_encoders = {}
+    for col in categorical_cols:
+        le = LabelEncoder()
+        df[col] = le.fit_transform(df[col].astype(str))
+        label_encoders[col] = le
+    scaler = StandardScaler()
+    df[numerical_cols] = scaler.fit_transform(df[numerical_cols])
+
+    X = df.drop(columns=[TARGET])
+    y = df[TARGET].to_numpy(dtype=float)
+    y_level = np.where(y > np.median(y), 'High Crime', 'Low Crime')
+    train_idx, test_idx = train_test_split(np.arange(len(X)), test_size=TEST_SIZE, random_state=RANDOM_STATE)
+    return {
+        "X": X,
+        "targets": {"regression": y, "classification": y_level},
+        "train_idx": train_idx,
+        "test_idx": test_idx,
+        "scaler": scaler,
+        "label_encoders": label_encoders,
+        "feature_columns": X.columns.tolist(),
+        "numerical_cols": numerical_cols,
+    }
+
+
+def load_features(dataset_path: str, cache_dir: str = FEATURE_CACHE_DIR, rebuild: bool = False) -> str:
+    """Path of the cached features for the dataset's current contents, building them on a miss"""
+    digest = dataset_hash(dataset_path)
+    path = os.path.join(cache_dir, f"features-v{FEATURES_VERSION}-{digest[:16]}.joblib")
+    if os.path.exists(path) and not rebuild:
+        print(f"📦 Using cached features {path}")
+        return path
+
+    start = time.perf_counter()
+    features = build_features(dataset_path)
+    features["dataset_hash"] = digest
+    os.makedirs(cache_dir, exist_ok=True)
+    joblib.dump(features, path + '.tmp')
+    os.replace(path + '.tmp', path)
+    print(f"🔧 Built features for {len(features['X'])} rows in {time.perf_counter() - start:.2f}s -> {path}")
+    return path
+
+
+def parse_grid(value: str, cast) -> List:
+    return [None if item.strip().lower() == 'none' else cast(item) for item in value.split(',') if item.strip()]
+
+
+def candidate_grid(trees: List[int], depths: List[Optional[int]], min_leaf: List[int]) -> List[Dict]:
+    return [{"n_estimators": n, "max_depth": depth, "min_samples_leaf": leaf}
+            for n, depth, leaf in itertools.product(trees, depths, min_leaf)]
+
+
+# Set once per pool worker so the feature matrix is read from the cache instead of pickled with every task
+_features: Optional[Dict] = None
+
+
+def _init_worker(features_path: str):
+    global _features
+    _features = joblib.load(features_path)
+
+
+def _score(task: str, y_true, y_pred) -> Dict:
+    if task == 'regression':
+        return {
+            "score": round(float(r2_score(y_true, y_pred)), 4),
+            "mae": round(float(mean_absolute_error(y_true, y_pred)), 4),
+            "rmse": round(float(np.sqrt(mean_squared_error(y_true, y_pred))), 4),
+        }
+    return {
+        "score": round(float(accuracy_score(y_true, y_pred)), 4),
+        "f1": round(float(f1_score(y_true, y_pred, average='weighted')), 4),
+    }
+
+
+def evaluate_candidate(task: str, params: Dict) -> Dict:
+    """Fit one candidate on the training split and measure score, latency and size"""
+    X, y = _features["X"], _features["targets"][task]
+    train_idx, test_idx = _features["train_idx"], _features["test_idx"]
+    X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+
+    model = TASKS[task](random_state=RANDOM_STATE, n_jobs=1, **params)
+    start = time.perf_counter()
+    model.fit(X_train, y[train_idx])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predictions = model.predict(X_test)
+    batch_seconds = time.perf_counter() - start
+
+    # crime_api predicts one single-row DataFrame per request
+    single_row = []
+    for position in range(min(LATENCY_SAMPLES, len(X_test))):
+        row = X_test.iloc[[position]]
+        start = time.perf_counter()
+        model.predict(row)
+        single_row.append(time.perf_counter() - start)
+
+    return {
+        "params": params,
+        **_score(task, y[test_idx], predictions),
+        "fit_seconds": round(fit_seconds, 3),
+        "latency_ms_p50": round(float(np.percentile(single_row, 50)) * 1000, 3),
+        "latency_ms_p95": round(float(np.percentile(single_row, 95)) * 1000, 3),
+        "batch_us_per_row": round(batch_seconds / len(X_test) * 1e6, 2),
+        "size_bytes": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+        "nodes": int(sum(tree.tree_.node_count for tree in model.estimators_)),
+    }
+
+
+def mark_frontier(results: List[Dict]):
+    """Flag candidates with no other candidate both faster and at least as accurate"""
+    best_score = float('-inf')
+    for result in sorted(results, key=lambda r: (r["latency_ms_p50"], -r["score"])):
+        result["frontier"] = result["score"] > best_score
+        best_score = max(best_score, result["score"])
+
+
+def select(results: List[Dict], max_latency_ms: Optional[float] = None) -> Optional[Dict]:
+    eligible = [r for r in results if max_latency_ms is None or r["latency_ms_p50"] <= max_latency_ms]
+    return max(eligible, key=lambda r: (r["score"], -r["latency_ms_p50"])) if eligible else None
+
+
+def run_search(features_path: str, task: str, candidates: List[Dict], jobs: int) -> List[Dict]:
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(features_path,)) as pool:
+        futures = [pool.submit(evaluate_candidate, task, params) for params in candidates]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            print(f"   [{done}/{len(candidates)}] {result['params']} score={result['score']} "
+                  f"p50={result['latency_ms_p50']}ms size={result['size_bytes'] / 1024:.0f}KB")
+    return results
+
+
+def save_model(features_path: str, params: Dict):
+    """Refit the chosen regressor and write it with its preprocessing artifacts where crime_api loads them"""
+    _init_worker(features_path)
+    X, y = _features["X"], _features["targets"]["regression"]
+    train_idx = _features["train_idx"]
+    model = RandomForestRegressor(random_state=RANDOM_STATE, n_jobs=1, **params)
+    model.fit(X.iloc[train_idx], y[train_idx])
+
+    os.makedirs(os.path.dirname(model_bundles.BASE_MODEL_PATH), exist_ok=True)
+    joblib.dump(model, model_bundles.BASE_MODEL_PATH)
+    joblib.dump(_features["scaler"], SCALER_PATH)
+    joblib.dump(_features["label_encoders"], ENCODERS_PATH)
+    joblib.dump(_features["feature_columns"], FEATURES_PATH)
+    joblib.dump(_features["numerical_cols"], NUM_COLS_PATH)
+    print(f"💾 Saved {params} to {model_bundles.BASE_MODEL_PATH}")
+    manifest = model_bundles.read_manifest()
+    if manifest:
+        print(f"⚠️ Bundle {manifest['version']} is still published and served ahead of the base model; "
+              f"remove {model_bundles.MANIFEST_PATH} to serve the new one")
+
+
+def print_table(results: List[Dict]):
+    print(f"\n{'':2}{'trees':>6} {'depth':>6} {'leaf':>5} {'score':>7} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'us/row':>8} {'size KB':>9} {'fit s':>7}")
+    for r in sorted(results, key=lambda r: r["latency_ms_p50"]):
+        p = r["params"]
+        print(f"{'*' if r['frontier'] else ' ':2}{p['n_estimators']:>6} {str(p['max_depth']):>6} "
+              f"{p['min_samples_leaf']:>5} {r['score']:>7} {r['latency_ms_p50']:>8} {r['latency_ms_p95']:>8} "
+              f"{r['batch_us_per_row']:>8} {r['size_bytes'] / 1024:>9.0f} {r['fit_seconds']:>7}")
+    print("  * latency/accuracy frontier")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search random forest settings for the crime model')
+    parser.add_argument('--dataset', default=DATASET_PATH)
+    parser.add_argument('--task', choices=sorted(TASKS), default='regression')
+    parser.add_argument('--trees', default=DEFAULT_TREES, help='Comma-separated n_estimators values')
+    parser.add_argument('--depth', default=DEFAULT_DEPTHS, help="Comma-separated max_depth values ('none' = unlimited)")
+    parser.add_argument('--min-leaf', default=DEFAULT_MIN_LEAF, help='Comma-separated min_samples_leaf values')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    parser.add_argument('--cache-dir', default=FEATURE_CACHE_DIR)
+    parser.add_argument('--rebuild-features', action='store_true', help='Ignore the feature cache')
+    parser.add_argument('--report', default=REPORT_PATH)
+    parser.add_argument('--save', action='store_true', help='Write the selected regressor for crime_api')
+    parser.add_argument('--max-latency-ms', type=float, help='Only select candidates with p50 latency under this')
+    args = parser.parse_args()
+    if args.save and args.task != 'regression':
+        parser.error('--save is only supported for --task regression (crime_api serves the regressor)')
+
+    features_path = load_features(args.dataset, args.cache_dir, args.rebuild_features)
+    candidates = candidate_grid(parse_grid(args.trees, int), parse_grid(args.depth, int),
+                                parse_grid(args.min_leaf, int))
+    print(f"🔍 Searching {len(candidates)} {args.task} candidates across {args.jobs} processes...")
+    start = time.perf_counter()
+    results = run_search(features_path, args.task, candidates, args.jobs)
+    mark_frontier(results)
+    selected = select(results, args.max_latency_ms)
+    print_table(results)
+
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "dataset": args.dataset,
+        "dataset_hash": dataset_hash(args.dataset),
+        "task": args.task,
+        "search_seconds": round(time.perf_counter() - start, 2),
+        "max_latency_ms": args.max_latency_ms,
+        "selected": selected["params"] if selected else None,
+        "candidates": sorted(results, key=lambda r: r["latency_ms_p50"]),
+    }
+    os.makedirs(os.path.dirname(args.report) or '.', exist_ok=True)
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📊 Report saved to {args.report}")
+
+    if selected is None:
+        print(f"❌ No candidate within {args.max_latency_ms}ms")
+        return
+    print(f"🎯 Selected {selected['params']} (score {selected['score']}, p50 {selected['latency_ms_p50']}ms)")
+    if args.save:
+        save_model(features_path, selected["params"])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Write-behind pipeline for community inserts.
+
+Request threads validate a write, reserve its row id and enqueue it; a single
+writer thread applies queued writes in group transactions. Each write gets a
+monotonically increasing sequence number so readers can wait until their own
+writes are committed (read-your-writes) without blocking on anyone else's.
+
+The client has already been answered when a write is applied, so a failure
+cannot be reported in the response. Transient SQLite errors (locked/busy) are
+retried; a write that still fails is recorded in the write_failures
+dead-letter table and reported by status(seq), which clients reach through
+their write token.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Optional
+
+DEAD_LETTER_TABLE = 'write_failures'
+SUBMIT_POLL_SECONDS = 0.01  # how often a submit with a timeout rechecks a full queue
+
+
+class IdAllocator:
+    """Hands out AUTOINCREMENT ids ahead of the insert by reserving blocks in sqlite_sequence"""
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], block_size: int = 100):
+        self.connect = connect
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._blocks = {}  # table -> [next_id, last_reserved_id]
+
+    def next_id(self, table: str) -> int:
+        with self._lock:
+            block = self._blocks.get(table)
+            if not block or block[0] > block[1]:
+                block = self._blocks[table] = self._reserve(table)
+            row_id = block[0]
+            block[0] += 1
+            return row_id
+
+    def _reserve(self, table: str) -> list:
+        # Advancing the sequence makes every other inserter (bulk ingestion,
+        # other processes) skip past the block we are about to use
+        conn = self.connect()
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,))
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}')
+            current = cursor.fetchone()[0]
+            cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)', (table, current + self.block_size))
+        else:
+            current = row[0]
+            cursor.execute('UPDATE sqlite_sequence SET seq = ? WHERE name = ?', (current + self.block_size, table))
+        conn.commit()
+        conn.close()
+        return [current + 1, current + self.block_size]
+
+
+class WriteBehindQueue:
+    """Single-writer queue that commits enqueued writes in group transactions"""
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], max_batch: int = 256,
+                 linger_seconds: float = 0.002, max_depth: int = 10000, max_attempts: int = 3,
+                 retry_backoff: float = 0.05):
+        self.connect = connect
+        self.max_batch = max_batch
+        self.linger_seconds = linger_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._failures = OrderedDict()  # seq -> error, most recent max_depth failures
+        # Sequence numbers restart with the process; the epoch keeps dead-letter rows apart
+        self._epoch = time.time()
+        self._queue = queue.Queue(maxsize=max_depth)
+        self._seq_lock = threading.Lock()
+        self._committed = threading.Condition()
+        self._next_seq = 0
+        self._committed_seq = 0
+        self._author_seq = {}
+        self._latencies_ms = deque(maxlen=512)
+        self._lags_ms = deque(maxlen=512)
+        self._counters = {"enqueued": 0, "committed": 0, "failed": 0, "retried": 0, "batches": 0}
+        self._thread = None
+        self._stopping = False
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+
+    def submit(self, apply: Callable, author: Optional[str] = None, on_commit: Optional[Callable] = None,
+               label: str = '', timeout: Optional[float] = None) -> int:
+        """Enqueue apply(cursor); returns the write's sequence number.
+
+        label (e.g. "incidents:42") identifies the write in the dead-letter table.
+        Raises queue.Full under backpressure, immediately or after waiting up to timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # Seqs must enter the queue in order, but nobody waits for room under the lock:
+            # a blocked background submit would otherwise stall every fail-fast request
+            with self._seq_lock:
+                seq = self._next_seq + 1
+                try:
+                    self._queue.put_nowait((seq, apply, on_commit, time.monotonic(), author, label))
+                except queue.Full:
+                    if deadline is None or time.monotonic() >= deadline:
+                        raise
+                else:
+                    # Only a queued write consumes a seq, so status() never reports a lost one as committed
+                    self._next_seq = seq
+                    if author:
+                        self._author_seq[author] = seq
+                    self._counters["enqueued"] += 1
+                    return seq
+            time.sleep(min(SUBMIT_POLL_SECONDS, max(0.0, deadline - time.monotonic())))
+
+    def last_seq_for(self, author: str) -> int:
+        return self._author_seq.get(author, 0)
+
+    def status(self, seq: int) -> Dict:
+        """pending, committed or failed (with the error) for a write's sequence number"""
+        if seq <= 0 or seq > self._next_seq:
+            return {"status": "unknown"}
+        if seq > self._committed_seq:
+            return {"status": "pending"}
+        error = self._failures.get(seq)
+        if error is None and len(self._failures) >= self._queue.maxsize:
+            # Evicted from memory; the dead-letter table is authoritative
+            error = self._dead_letter_error(seq)
+        if error is not None:
+            return {"status": "failed", "error": error}
+        return {"status": "committed"}
+
+    def wait_for(self, seq: int, timeout: float = 2.0) -> bool:
+        """Block until the write with this sequence number has been applied"""
+        with self._committed:
+            return self._committed.wait_for(lambda: self._committed_seq >= seq, timeout)
+
+    def stop(self, timeout: float = 5.0):
+        """Drain outstanding writes and stop the writer thread"""
+        self._stopping = True
+        if self._thread is not None:
+            self._queue.put((None,) * 6)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> Dict:
+        latencies = sorted(self._latencies_ms)
+        lags = sorted(self._lags_ms)
+
+        def percentile(values, p):
+            return round(values[min(len(values) - 1, int(len(values) * p))], 2) if values else 0.0
+
+        return {
+            "enabled": True,
+            "queue_depth": self._queue.qsize(),
+            "committed_seq": self._committed_seq,
+            "commit_latency_ms": {"p50": percentile(latencies, 0.5), "p95": percentile(latencies, 0.95),
+                                  "max": percentile(latencies, 1.0)},
+            "enqueue_to_commit_ms": {"p50": percentile(lags, 0.5), "p95": percentile(lags, 0.95),
+                                     "max": percentile(lags, 1.0)},
+            **self._counters
+        }
+
+    def _next_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.linger_seconds
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+        return batch
+
+    def _run(self):
+        conn = self.connect()
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {DEAD_LETTER_TABLE} (
+                epoch REAL NOT NULL,
+                seq INTEGER NOT NULL,
+                label TEXT,
+                author TEXT,
+                error TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                failed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.commit()
+        while True:
+            batch = self._next_batch()
+            stop = any(item[0] is None for item in batch)
+            batch = [item for item in batch if item[0] is not None]
+
+            if batch:
+                start = time.monotonic()
+                committed = self._apply_batch(conn, batch)
+                finished = time.monotonic()
+
+                self._latencies_ms.append((finished - start) * 1000)
+                for _, _, _, enqueued_at, _, _ in batch:
+                    self._lags_ms.append((finished - enqueued_at) * 1000)
+                self._counters["batches"] += 1
+                self._counters["committed"] += len(committed)
+                self._counters["failed"] += len(batch) - len(committed)
+
+                with self._committed:
+                    self._committed_seq = batch[-1][0]
+                    self._committed.notify_all()
+
+                for _, _, on_commit, _, _, _ in committed:
+                    if on_commit:
+                        on_commit()
+
+            if stop or (self._stopping and self._queue.empty()):
+                break
+        conn.close()
+
+    def _apply_batch(self, conn: sqlite3.Connection, batch: list) -> list:
+        cursor = conn.cursor()
+        try:
+            for item in batch:
+                item[1](cursor)
+            conn.commit()
+            return batch
+        except Exception:
+            conn.rollback()
+
+        # One bad write must not sink the group: replay individually
+        return [item for item in batch if self._apply_one(conn, cursor, item)]
+
+    def _apply_one(self, conn: sqlite3.Connection, cursor: sqlite3.Cursor, item: tuple) -> bool:
+        """Apply one write, retrying transient errors; dead-letters it once attempts run out"""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                item[1](cursor)
+                conn.commit()
+                return True
+            except sqlite3.OperationalError as e:
+                # Locked/busy databases clear up; retry with backoff
+                conn.rollback()
+                error = e
+                if attempt < self.max_attempts:
+                    self._counters["retried"] += 1
+                    time.sleep(self.retry_backoff * attempt)
+            except Exception as e:
+                # Constraint and programming errors fail the same way every time
+                conn.rollback()
+                error = e
+                break
+        self._dead_letter(conn, item, error, attempt)
+        return False
+
+    def _dead_letter(self, conn: sqlite3.Connection, item: tuple, error: Exception, attempts: int):
+        seq, _, _, _, author, label = item
+        self._failures[seq] = str(error)
+        while len(self._failures) > self._queue.maxsize:
+            self._failures.popitem(last=False)
+        try:
+            conn.execute(f'''
+                INSERT INTO {DEAD_LETTER_TABLE} (epoch, seq, label, author, error, attempts)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (self._epoch, seq, label, author, str(error), attempts))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+
+    def _dead_letter_error(self, seq: int) -> Optional[str]:
+        conn = self.connect()
+        try:
+            row = conn.execute(f'SELECT error FROM {DEAD_LETTER_TABLE} WHERE epoch = ? AND seq = ?',
+                               (self._epoch, seq)).fetchone()
+        except sqlite3.Error:
+            row = None
+        conn.close()
+        return row[0] if row else None
@@ -83,6 +83,7 @@ export interface DiscussionDetail {
   createdAt: string;
   updatedAt: string;
   content: string;
+  next_cursor?: string | null;
 }
 
 export interface Reply {
@@ -93,6 +94,47 @@ export interface Reply {
   createdAt: string;
 }
 
+export interface RouteAnalysis {
+  route: {
+    start: { lat: number; lng: number };
+    end: { lat: number; lng: number };
+    midpoint: { lat: number; lng: number };
+  };
+  safety: {
+    overallScore: number;
+    riskLevel: 'low' | 'medium' | 'high';
+    incidentsCount: number;
+    recommendations: string[];
+    alternativeRoutes?: string[];
+  };
+  recentIncidents: Array<{
+    type: string;
+    location: string;
+    time: string;
+    severity: 'low' | 'medium' | 'high';
+    description: string;
+  }>;
+  databaseIncidents: Alert[];
+  timeAnalysis: {
+    morning: { risk: string; score: number };
+    afternoon: { risk: string; score: number };
+    evening: { risk: string; score: number };
+    night: { risk: string; score: number };
+  };
+  userComments: Array<{
+    id?: number;
+    author: string;
+    comment: string;
+    rating: number;
+    timeAgo: string;
+    createdAt?: string;
+    sentiment: 'positive' | 'negative' | 'neutral';
+    suggests_alternative?: boolean;
+  }>;
+  aiConfidence: number;
+  source: string;
+}
+
 // API Functions
 export const communityApi = {
   // Get community statistics
@@ -170,46 +212,7 @@ export const communityApi = {
   },
 
   // Analyze route safety between two points using ChatGPT API
-  analyzeRoute: async (startLat: number, startLng: number, endLat: number, endLng: number): Promise<{
-    route: {
-      start: { lat: number; lng: number };
-      end: { lat: number; lng: number };
-      midpoint: { lat: number; lng: number };
-    };
-    safety: {
-      overallScore: number;
-      riskLevel: 'low' | 'medium' | 'high';
-      incidentsCount: number;
-      recommendations: string[];
-      alternativeRoutes?: string[];
-    };
-    recentIncidents: Array<{
-      type: string;
-      location: string;
-      time: string;
-      severity: 'low' | 'medium' | 'high';
-      description: string;
-    }>;
-    databaseIncidents: Alert[];
-    timeAnalysis: {
-      morning: { risk: string; score: number };
-      afternoon: { risk: string; score: number };
-      evening: { risk: string; score: number };
-      night: { risk: string; score: number };
-    };
-    userComments: Array<{
-      id?: number;
-      author: string;
-      comment: string;
-      rating: number;
-      timeAgo: string;
-      createdAt?: string;
-      sentiment: 'positive' | 'negative' | 'neutral';
-      suggests_alternative?: boolean;
-    }>;
-    aiConfidence: number;
-    source: string;
-  }> => {
+  analyzeRoute: async (startLat: number, startLng: number, endLat: number, endLng: number): Promise<RouteAnalysis> => {
     console.log('API: analyzeRoute called with:', { startLat, startLng, endLat, endLng });
     
     try {
@@ -228,6 +231,74 @@ export const communityApi = {
     }
   },
 
+  // Stream route analysis progressively (incidents and comments arrive before the AI analysis).
+  // Returns a function that closes the stream.
+  streamRouteAnalysis: (
+    startLat: number,
+    startLng: number,
+    endLat: number,
+    endLng: number,
+    handlers: {
+      onIncidents?: (incidents: Alert[]) => void;
+      onComments?: (comments: RouteAnalysis['userComments']) => void;
+      onAiAnalysis?: (analysis: Record<string, unknown>, cacheStatus: string) => void;
+      onComplete: (analysis: RouteAnalysis) => void;
+      onError?: (error: string) => void;
+    }
+  ): (() => void) => {
+    const params = new URLSearchParams({
+      startLat: String(startLat),
+      startLng: String(startLng),
+      endLat: String(endLat),
+      endLng: String(endLng),
+    });
+    const source = new EventSource(`${API_BASE_URL}/community/route-analysis/stream?${params}`);
+
+    source.addEventListener('incidents', (event) => handlers.onIncidents?.(JSON.parse((event as MessageEvent).data)));
+    source.addEventListener('comments', (event) => handlers.onComments?.(JSON.parse((event as MessageEvent).data)));
+    source.addEventListener('ai_analysis', (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      handlers.onAiAnalysis?.(data.analysis, data.cacheStatus);
+    });
+    source.addEventListener('complete', (event) => {
+      handlers.onComplete(JSON.parse((event as MessageEvent).data));
+      source.close();
+    });
+    source.addEventListener('error', (event) => {
+      const data = (event as MessageEvent).data;
+      handlers.onError?.(data ? JSON.parse(data).error : 'Route analysis stream failed');
+      source.close();
+    });
+
+    return () => source.close();
+  },
+
+  // Subscribe to newly reported incidents pushed over server-sent events, either near a
+  // point (radius in km) or inside a viewport. Returns a function that closes the stream.
+  subscribeToIncidents: (
+    area: { lat: number; lng: number; radius?: number } | { bbox: [number, number, number, number] } | null,
+    handlers: {
+      onIncident: (incident: Alert & { latitude?: number | null; longitude?: number | null }) => void;
+      onResync?: () => void;
+    }
+  ): (() => void) => {
+    const params = new URLSearchParams();
+    if (area && 'bbox' in area) {
+      params.set('bbox', area.bbox.join(','));
+    } else if (area) {
+      params.set('lat', String(area.lat));
+      params.set('lng', String(area.lng));
+      params.set('radius', String(area.radius || 5));
+    }
+    const source = new EventSource(`${API_BASE_URL}/community/incidents/stream?${params}`);
+
+    source.addEventListener('incident', (event) => handlers.onIncident(JSON.parse((event as MessageEvent).data)));
+    // Sent when this client fell behind; EventSource reconnects on its own, missed incidents come from a refetch
+    source.addEventListener('resync', () => handlers.onResync?.());
+
+    return () => source.close();
+  },
+
   // Create incident with location data
   createIncident: async (data: {
     title: string;
@@ -113,12 +113,28 @@ const Community = () => {
   const { data: alerts, isLoading: alertsLoading, error: alertsError } = useQuery({
     queryKey: ['community-alerts', userLocation?.lat, userLocation?.lng],
     queryFn: () => userLocation ? communityApi.getLocationAlerts(userLocation.lat, userLocation.lng, 10) : communityApi.getAlerts(),
-    refetchInterval: 30000, // Refetch every 30 seconds
+    refetchInterval: 300000, // New incidents are pushed; polling is only a backstop
     retry: 1, // Only retry once
     staleTime: 15000, // Consider data stale after 15 seconds
     enabled: true, // Always enabled, falls back to general alerts if no location
   });
 
+  // Push newly reported incidents into the alerts list as they are committed
+  useEffect(() => {
+    const queryKey = ['community-alerts', userLocation?.lat, userLocation?.lng];
+    return communityApi.subscribeToIncidents(
+      userLocation ? { lat: userLocation.lat, lng: userLocation.lng, radius: 10 } : null,
+      {
+        onIncident: (incident) => {
+          queryClient.setQueryData<Alert[]>(queryKey, (current) =>
+            current?.some((alert) => alert.id === incident.id) ? current : [incident, ...(current || [])]
+          );
+        },
+        onResync: () => queryClient.invalidateQueries({ queryKey: ['community-alerts'] }),
+      }
+    );
+  }, [userLocation?.lat, userLocation?.lng, queryClient]);
+
   // Fetch AI analysis for location
   const { data: aiAnalysis, isLoading: analysisLoading } = useQuery({
     queryKey: ['ai-analysis', userLocation?.lat, userLocation?.lng],